@@ -0,0 +1,161 @@
+"""
+Benchmark the extractors against the local mock API (benchmarks/mock_api.py).
+
+Runs ClimateTraceExtractor, WorldBankExtractor and data_extractor in their
+different modes against an in-process mock server and reports wall time,
+requests sent and requests/second (median of --repeat runs). Every run
+starts from an empty working folder and country cache, and client-side rate
+limiting is off unless --client_rate is given, so the numbers measure the
+extractors rather than the throttle; use --rate_limit to have the server
+answer 429s instead.
+
+Range mode is reported both ways: climate_trace_range against the default
+mock, which sums multi-year windows like the real API (so the extractor
+falls back to one-year windows after probing), and climate_trace_range_split
+with the mock returning multi-year windows per year (--range_years).
+
+Usage: python benchmarks/bench_extractors.py [--years 2019 2020] [--latency 0.1] [--jitter 0.02]
+                                             [--tail_rate 0.05 --tail_latency 3] [--hedge_budget 0.1]
+                                             [--rate_limit 20 40] [--failure_rate 0.01]
+                                             [--scenarios climate_trace world_bank ...] [--repeat 3]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BENCHMARKS_DIR, '..', 'scripts'))
+from mock_api import MockAPI, load_fixture, start_server
+
+
+def point_extractors_at(base_url):
+    """Configure the API base URLs; must run before the pipeline modules are imported."""
+    os.environ["CLIMATE_TRACE_API_URL"] = f"{base_url}/v6"
+    os.environ["WORLD_BANK_API_URL"] = f"{base_url}/v2"
+    os.environ.pop("EXTRACTOR_CACHE_PATH", None)
+
+
+def scenarios(years, hedge_budget, api):
+    """Scenario name -> function running one extraction of years."""
+    from climate_trace_extractor import ClimateTraceExtractor
+    from world_bank_extractor import WorldBankExtractor
+    import data_extractor
+
+    since, to = years[0], years[-1]
+
+    def range_split():
+        api.range_years = True
+        try:
+            return ClimateTraceExtractor(since, to, range_mode=True).extract_emissions_by_year()
+        finally:
+            api.range_years = False
+
+    def run_pipelines():
+        for year in years:
+            data_extractor.run_pipelines(year, {source: os.path.join("data", source)
+                                                for source in data_extractor.OUTPUT_FILES})
+
+    return {
+        "climate_trace": lambda: ClimateTraceExtractor(since, to).extract_emissions_by_year(),
+        "climate_trace_range": lambda: ClimateTraceExtractor(since, to, range_mode=True).extract_emissions_by_year(),
+        "climate_trace_range_split": range_split,
+        "climate_trace_streaming": lambda: ClimateTraceExtractor(since, to, streaming=True).extract_emissions_by_year(),
+        "climate_trace_hedged": lambda: ClimateTraceExtractor(since, to, hedge_budget=hedge_budget).extract_emissions_by_year(),
+        "world_bank": lambda: WorldBankExtractor(since, to).extract_data(),
+        "world_bank_bulk": lambda: WorldBankExtractor(since, to, bulk=True).extract_data(),
+        "world_bank_multi": lambda: WorldBankExtractor(since, to, multi_indicator=True).extract_data(),
+        "world_bank_streaming": lambda: WorldBankExtractor(since, to, streaming=True).extract_data(),
+        "data_extractor": run_pipelines,
+    }
+
+
+def fresh_process_state(client_rate):
+    """New shared transport and country registry, so runs do not reuse each other's connections or lists."""
+    import country_registry
+    import http_transport
+    from rate_limiter import RateLimiter
+
+    limit = tuple(client_rate) if client_rate else (1e6, 1e6)
+    http_transport._shared_transport = http_transport.HttpTransport(
+        rate_limiter=RateLimiter(host_limits={}, default_limit=limit))
+    country_registry._shared_registry = country_registry.CountryRegistry(cache_dir=None)
+
+
+def run_once(name, func, api, client_rate, verbose):
+    """Run one scenario in an empty folder; returns (seconds, server stats, result)."""
+    fresh_process_state(client_rate)
+    api.reset_stats()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        started = time.perf_counter()
+        try:
+            with output:
+                result = func()
+        except Exception as e:
+            result = e
+        finally:
+            seconds = time.perf_counter() - started
+            os.chdir(cwd)
+    return seconds, dict(api.stats), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extractor throughput benchmark against the mock API")
+    parser.add_argument("--years", type=int, nargs="+", default=[2019, 2020], help="First and last year")
+    parser.add_argument("--countries", type=int, default=250, help="Countries in the synthetic fixture")
+    parser.add_argument("--fixture", help="Recorded fixture (see mock_api.py record)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Server latency per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- latency jitter (s)")
+    parser.add_argument("--tail_rate", type=float, default=0.0, help="Fraction of responses that are slow")
+    parser.add_argument("--tail_latency", type=float, default=2.0, help="Seconds a slow response takes")
+    parser.add_argument("--hedge_budget", type=float, default=0.1,
+                        help="Hedge budget of climate_trace_hedged (data_extractor reads EXTRACTOR_HEDGE_BUDGET)")
+    parser.add_argument("--rate_limit", type=float, nargs=2, metavar=("RATE", "BURST"),
+                        help="Server answers 429 above this rate")
+    parser.add_argument("--failure_rate", type=float, default=0.0, help="Fraction of requests that fail with 503")
+    parser.add_argument("--client_rate", type=float, nargs=2, metavar=("RATE", "BURST"),
+                        help="Client-side rate limit per host (default: off)")
+    parser.add_argument("--scenarios", nargs="+", help="Scenarios to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario; the median is reported")
+    parser.add_argument("--verbose", action="store_true", help="Show the extractors' output")
+    args = parser.parse_args()
+
+    years = list(range(min(args.years), max(args.years) + 1))
+    api = MockAPI(load_fixture(args.fixture, args.countries), latency=args.latency, jitter=args.jitter,
+                  rate_limit=tuple(args.rate_limit) if args.rate_limit else None, failure_rate=args.failure_rate,
+                  tail_rate=args.tail_rate, tail_latency=args.tail_latency)
+    server, base_url = start_server(api)
+    point_extractors_at(base_url)
+
+    available = scenarios(years, args.hedge_budget, api)
+    selected = args.scenarios or list(available)
+    unknown = [name for name in selected if name not in available]
+    if unknown:
+        parser.error(f"unknown scenarios {unknown}; choose from {list(available)}")
+
+    print(f"Mock API at {base_url}: years {years[0]}-{years[-1]}, latency {args.latency}s, "
+          f"slow tail {args.tail_rate:.0%} at {args.tail_latency}s, rate limit {args.rate_limit or 'off'}, "
+          f"failure rate {args.failure_rate}")
+    print(f"{'scenario':<26} {'wall (s)':>9} {'requests':>9} {'req/s':>8} {'429s':>6} {'failed':>7} {'slow':>5}  result")
+
+    for name in selected:
+        runs = [run_once(name, available[name], api, args.client_rate, args.verbose) for _ in range(args.repeat)]
+        seconds = statistics.median(run[0] for run in runs)
+        # Stats and outcome of the median run
+        _, stats, result = min(runs, key=lambda run: abs(run[0] - seconds))
+        outcome = f"error: {result}" if isinstance(result, Exception) else ("incomplete" if result else "ok")
+        print(f"{name:<26} {seconds:>9.2f} {stats['requests']:>9} {stats['requests'] / seconds:>8.1f} "
+              f"{stats['rate_limited']:>6} {stats['failed']:>7} {stats['slow']:>5}  {outcome}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark python_processor offline, against an in-memory or local object store.
+
+Lands synthetic World Bank and Climate Trace years (shaped like the
+extractors' output) in memory://bench or under --root, then times
+process_world_bank_data and process_climate_trace_data for every year and
+one combine_datasets over all of them (median of --repeat runs). No cloud
+credentials are needed; --latency adds a delay to every memory-store request
+to stand in for object-store round trips.
+
+Usage: python benchmarks/bench_processor.py [--years 2000 2024] [--countries 250]
+                                            [--landing_format csv|parquet] [--root DIR] [--repeat 3]
+                                            [--latency 0.05] [--fetch_workers 8]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BENCHMARKS_DIR, '..', 'scripts'))
+
+import pandas as pd
+
+from landing_format import write_landing_to_store
+from mock_api import INDICATORS, GASES, synthetic_fixture
+import object_store
+from object_store import MemoryStore, resolve
+import python_processor
+
+# Climate Trace rows per country and year (the landed file has one row per sector)
+CT_SECTORS = 10
+
+
+class SlowMemoryStore(MemoryStore):
+    """MemoryStore whose reads and listings take latency seconds, like requests to a remote store."""
+
+    def __init__(self, name, latency):
+        super().__init__(name)
+        self.latency = latency
+
+    def get(self, key):
+        time.sleep(self.latency)
+        return super().get(key)
+
+    def size(self, key):
+        time.sleep(self.latency)
+        return super().size(key)
+
+    def exists(self, key):
+        time.sleep(self.latency)
+        return super().exists(key)
+
+    def list(self, prefix=""):
+        time.sleep(self.latency)
+        return super().list(prefix)
+
+
+def land_years(base_uri, years, n_countries, landing_format):
+    """Write one landed file per source and year under base_uri, as the extraction DAG does."""
+    fixture = synthetic_fixture(n_countries, years)
+    codes = [c["alpha3"] for c in fixture["climate_trace"]["countries"]]
+    indicators = fixture["world_bank"]["indicators"]
+    emissions = fixture["climate_trace"]["emissions"]
+
+    for year in years:
+        wb = pd.DataFrame({"country": codes})
+        for indicator in INDICATORS:
+            wb[indicator] = [indicators[indicator][str(year)].get(code) for code in codes]
+        ct = pd.DataFrame([{"country": code, "sector": f"sector_{i}",
+                            **{gas: emissions[code][str(year)][gas] / CT_SECTORS for gas in GASES}}
+                           for code in codes for i in range(CT_SECTORS)])
+        for df, path in [(wb, f"world_bank/world_bank_indicators_{year}"), (ct, f"climate_trace/global_emissions_{year}")]:
+            store, key = resolve(f"{base_uri}/{path}")
+            write_landing_to_store(df, store, key, landing_format, year)
+
+
+def run_once(base_uri, years, ext):
+    """Process every year and combine them; returns seconds per step."""
+    timings = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        for year in years:
+            python_processor.process_world_bank_data(f"{base_uri}/world_bank/world_bank_indicators_{year}{ext}",
+                                                     f"{base_uri}/processed/world_bank")
+        timings["process_world_bank"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for year in years:
+            python_processor.process_climate_trace_data(f"{base_uri}/climate_trace/global_emissions_{year}{ext}",
+                                                        f"{base_uri}/processed/climate_trace")
+        timings["process_climate_trace"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        python_processor.combine_datasets(f"{base_uri}/processed/world_bank", f"{base_uri}/processed/climate_trace",
+                                          f"{base_uri}/processed/combined")
+        timings["combine"] = time.perf_counter() - started
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="python_processor benchmark on an offline object store")
+    parser.add_argument("--years", type=int, nargs="+", default=[2000, 2024], help="First and last year")
+    parser.add_argument("--countries", type=int, default=250, help="Countries per year")
+    parser.add_argument("--landing_format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--root", help="Local directory to use instead of memory://bench")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs; the median of each step is reported")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per memory-store request")
+    parser.add_argument("--fetch_workers", type=int, help="Parallel partition reads in combine_datasets")
+    args = parser.parse_args()
+
+    years = list(range(min(args.years), max(args.years) + 1))
+    base_uri = os.path.abspath(args.root) if args.root else "memory://bench"
+    if args.latency and not args.root:
+        object_store._stores[("memory", "bench")] = SlowMemoryStore("bench", args.latency)
+    if args.fetch_workers:
+        os.environ["PROCESSOR_FETCH_WORKERS"] = str(args.fetch_workers)
+    with contextlib.redirect_stdout(io.StringIO()):
+        land_years(base_uri, years, args.countries, args.landing_format)
+
+    runs = [run_once(base_uri, years, f".{args.landing_format}") for _ in range(args.repeat)]
+    print(f"{len(years)} years x {args.countries} countries, {args.landing_format} landing, store {base_uri}"
+          f"{f' ({args.latency}s per request)' if args.latency and not args.root else ''}")
+    print(f"{'step':<24} {'wall (s)':>9} {'per year (ms)':>14}")
+    for step in runs[0]:
+        seconds = statistics.median(run[step] for run in runs)
+        print(f"{step:<24} {seconds:>9.2f} {1000 * seconds / len(years):>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
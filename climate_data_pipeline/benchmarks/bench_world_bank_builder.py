@@ -0,0 +1,106 @@
+"""
+Benchmark the World Bank row accumulation of the extraction engine.
+
+Compares the previous list-of-dicts accumulation (linear search for the
+country entry of every item) with the indexed KeyedColumnBuilder, on
+synthetic API items at 1x, 10x and 100x the current number of countries.
+
+Usage: python benchmarks/bench_world_bank_builder.py [--scales 1 10 100]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from extraction_sources import parse_world_bank_item
+from table_builder import KeyedColumnBuilder
+
+# Roughly what the World Bank API returns today: ~266 economies, 7 indicators
+BASE_COUNTRIES = 266
+INDICATORS = ['SP.POP.TOTL', 'NY.GDP.PCAP.CD', 'SI.POV.GAPS', 'SP.DYN.LE00.IN',
+              'SE.SEC.ENRR', 'SI.POV.GINI', 'SL.UEM.TOTL.ZS']
+YEAR = 2020
+
+
+def make_items(n_countries):
+    """Synthetic API items, one list per indicator."""
+    countries = [f"C{i:06d}" for i in range(n_countries)]
+    return {
+        code: [{'countryiso3code': country, 'value': float(i + j)} for j, country in enumerate(countries)]
+        for i, code in enumerate(INDICATORS)
+    }
+
+
+def legacy_accumulate(items_by_indicator):
+    """The previous implementation: linear search for every (indicator, country) pair."""
+    all_data = []
+    for indicator_code, items in items_by_indicator.items():
+        for item in items:
+            country_code = item.get('countryiso3code')
+            value = item.get('value')
+            if not country_code or value is None or country_code == '':
+                continue
+            country_entry = next((c for c in all_data if c.get('country') == country_code), None)
+            if country_entry is None:
+                country_entry = {'country': country_code, 'year': YEAR}
+                all_data.append(country_entry)
+            country_entry[indicator_code] = value
+    return pd.DataFrame(all_data)
+
+
+def indexed_accumulate(items_by_indicator):
+    """The current implementation in PagedSource.build."""
+    builder = KeyedColumnBuilder('country', constants={'year': YEAR})
+    for indicator_code, items in items_by_indicator.items():
+        for item in items:
+            parsed = parse_world_bank_item(item, indicator_code)
+            if parsed is not None:
+                builder.set(*parsed)
+    return builder.to_frame(column_order=INDICATORS)
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="World Bank accumulation benchmark")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100],
+                        help="Multiples of the current country count to benchmark")
+    parser.add_argument("--max_legacy_countries", type=int, default=5000,
+                        help="Above this size the quadratic version is extrapolated instead of run")
+    args = parser.parse_args()
+
+    print(f"{'scale':>6} {'rows':>8} {'legacy (s)':>14} {'indexed (s)':>12} {'speedup':>10}")
+
+    last_legacy = None  # (countries, seconds) of the largest measured legacy run
+    for scale in args.scales:
+        n_countries = BASE_COUNTRIES * scale
+        items = make_items(n_countries)
+
+        new_df, new_seconds = timed(indexed_accumulate, items)
+
+        if n_countries <= args.max_legacy_countries:
+            old_df, old_seconds = timed(legacy_accumulate, items)
+            assert old_df.equals(new_df), "indexed builder output differs from the legacy output"
+            last_legacy = (n_countries, old_seconds)
+            legacy_label = f"{old_seconds:.4f}"
+        elif last_legacy:
+            # Quadratic in the number of countries
+            old_seconds = last_legacy[1] * (n_countries / last_legacy[0]) ** 2
+            legacy_label = f"~{old_seconds:.1f} (est)"
+        else:
+            old_seconds = None
+            legacy_label = "skipped"
+
+        speedup = f"{old_seconds / new_seconds:.0f}x" if old_seconds else "-"
+        print(f"{scale:>5}x {n_countries:>8} {legacy_label:>14} {new_seconds:>12.4f} {speedup:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Local stand-in for the Climate Trace v6 and World Bank v2 APIs.
+
+Serves the endpoints the extractors use from a fixture (recorded from the
+real APIs with `record`, or generated synthetically) with configurable
+latency, jitter, slow-tail responses, rate limiting (429 + Retry-After)
+and failure injection:
+
+    /v6/definitions/countries/
+    /v6/country/emissions?since=&to=&countries=A,B,C
+    /v2/country?format=json&page=&per_page=
+    /v2/countries/all/indicators/<id>[;<id>...]?date=Y[:Y2]&page=&per_page=
+
+Point the extractors at it with
+    CLIMATE_TRACE_API_URL=http://127.0.0.1:8099/v6
+    WORLD_BANK_API_URL=http://127.0.0.1:8099/v2
+
+Usage:
+    python benchmarks/mock_api.py serve [--port 8099] [--fixture FILE] [--latency 0.2] [--jitter 0.05]
+                                        [--tail_rate 0.05 --tail_latency 3] [--rate_limit 5 10]
+                                        [--failure_rate 0.02] [--range_years]
+    python benchmarks/mock_api.py record FILE --years 2019 2020
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Mirrors schemas.WORLD_BANK_INDICATORS (kept here so the server has no pipeline imports)
+INDICATORS = ['SP.POP.TOTL', 'NY.GDP.PCAP.CD', 'SI.POV.GAPS', 'SP.DYN.LE00.IN',
+              'SE.SEC.ENRR', 'SI.POV.GINI', 'SL.UEM.TOTL.ZS']
+GASES = ['co2', 'ch4', 'n2o', 'co2e_100yr', 'co2e_20yr']
+
+
+def synthetic_fixture(n_countries=250, years=range(2000, 2025), seed=0):
+    """
+    Fixture shaped like the real APIs: n_countries countries with emissions
+    and indicator values for every year, about 10% of indicator values missing.
+    """
+    rng = random.Random(seed)
+    codes = [f"{chr(65 + i // 676 % 26)}{chr(65 + i // 26 % 26)}{chr(65 + i % 26)}" for i in range(n_countries)]
+    return {
+        "climate_trace": {
+            "countries": [{"alpha3": code, "name": f"Country {code}", "continent": "Test"} for code in codes],
+            "emissions": {code: {str(year): {gas: round(rng.uniform(0, 1e9), 2) for gas in GASES} for year in years}
+                          for code in codes},
+        },
+        "world_bank": {
+            "countries": [{"id": code, "iso2Code": code[:2], "name": f"Country {code}"} for code in codes],
+            "indicators": {indicator: {str(year): {code: round(rng.uniform(0, 1e6), 3) for code in codes
+                                                   if rng.random() > 0.1}
+                                       for year in years}
+                           for indicator in INDICATORS},
+        },
+    }
+
+
+def record_fixture(path, years, batch_size=50):
+    """Record a fixture for years from the real APIs (used as-is, no transport or caching)."""
+    import requests
+
+    session = requests.Session()
+    fixture = {"climate_trace": {"emissions": {}}, "world_bank": {"indicators": {}}}
+
+    ct_countries = session.get("https://api.climatetrace.org/v6/definitions/countries/", timeout=60).json()
+    fixture["climate_trace"]["countries"] = ct_countries
+    codes = [c["alpha3"] for c in ct_countries if c.get("alpha3")]
+    for year in years:
+        for i in range(0, len(codes), batch_size):
+            url = (f"https://api.climatetrace.org/v6/country/emissions?since={year}&to={year + 1}"
+                   f"&countries={','.join(codes[i:i + batch_size])}")
+            for item in session.get(url, timeout=60).json():
+                if isinstance(item, dict) and item.get("country"):
+                    fixture["climate_trace"]["emissions"].setdefault(item["country"], {})[str(year)] = item.get("emissions", {})
+            time.sleep(0.25)
+
+    def wb_listing(url, params):
+        items, page, pages = [], 1, 1
+        while page <= pages:
+            metadata, rows = session.get(url, params={**params, "page": page}, timeout=60).json()
+            pages = int(metadata.get("pages", 1) or 1)
+            items.extend(rows or [])
+            page += 1
+        return items
+
+    fixture["world_bank"]["countries"] = wb_listing("https://api.worldbank.org/v2/country",
+                                                    {"format": "json", "per_page": 300})
+    for indicator in INDICATORS:
+        values = fixture["world_bank"]["indicators"].setdefault(indicator, {})
+        for year in years:
+            rows = wb_listing(f"https://api.worldbank.org/v2/countries/all/indicators/{indicator}",
+                              {"format": "json", "date": year, "per_page": 1000})
+            values[str(year)] = {row["countryiso3code"]: row["value"] for row in rows
+                                 if row.get("countryiso3code") and row.get("value") is not None}
+
+    with open(path, "w") as f:
+        json.dump(fixture, f)
+    print(f"Recorded fixture for {list(years)} to {path}")
+
+
+class MockAPI:
+    """Fixture, behaviour settings and request counters shared by the handler threads."""
+
+    def __init__(self, fixture, latency=0.0, jitter=0.0, rate_limit=None, failure_rate=0.0,
+                 failure_status=503, seed=0, tail_rate=0.0, tail_latency=0.0, range_years=False):
+        self.fixture = fixture
+        self.latency = latency
+        self.jitter = jitter
+        # A tail_rate fraction of responses take tail_latency seconds instead (stuck backends)
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        # Multi-year emission windows are summed per country, as the real API does;
+        # with range_years every item is returned per year with its 'year' instead
+        self.range_years = range_years
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "rate_limited": 0, "failed": 0, "slow": 0}
+
+        # Server-side token bucket: (requests per second, burst), or None for no limit
+        self.rate_limit = rate_limit
+        self.tokens = float(rate_limit[1]) if rate_limit else 0.0
+        self.updated = time.monotonic()
+
+        self.ct_codes = [c["alpha3"] for c in fixture["climate_trace"]["countries"]]
+
+    def admit(self):
+        """Decide what happens to a request: None to serve it, or an error status."""
+        with self.lock:
+            self.stats["requests"] += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                rate, burst = self.rate_limit
+                self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+                self.updated = now
+                if self.tokens < 1:
+                    self.stats["rate_limited"] += 1
+                    return 429
+                self.tokens -= 1
+            if self.failure_rate and self.random.random() < self.failure_rate:
+                self.stats["failed"] += 1
+                return self.failure_status
+            delay = self.latency + (self.random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+            if self.tail_rate and self.random.random() < self.tail_rate:
+                self.stats["slow"] += 1
+                delay = self.tail_latency
+        time.sleep(max(0.0, delay))
+        return None
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {key: 0 for key in self.stats}
+
+    def ct_emissions(self, query):
+        since, to = int(query["since"]), int(query["to"])
+        countries = query.get("countries", ",".join(self.ct_codes)).split(",")
+        emissions = self.fixture["climate_trace"]["emissions"]
+        items = []
+        for code in countries:
+            yearly = {year: emissions.get(code, {}).get(str(year)) for year in range(since, to)}
+            yearly = {year: values for year, values in yearly.items() if values is not None}
+            if to - since > 1 and self.range_years:
+                items.extend({"country": code, "continent": "Test", "emissions": values, "year": year}
+                             for year, values in yearly.items())
+            elif yearly:
+                totals = {}
+                for values in yearly.values():
+                    for gas, value in values.items():
+                        totals[gas] = totals.get(gas, 0) + (value or 0)
+                items.append({"country": code, "continent": "Test", "emissions": totals})
+        return items
+
+    def wb_page(self, rows, query, default_per_page=50):
+        per_page = int(query.get("per_page", default_per_page))
+        page = int(query.get("page", 1))
+        pages = max(1, -(-len(rows) // per_page))
+        metadata = {"page": page, "pages": pages, "per_page": per_page, "total": len(rows)}
+        return [metadata, rows[(page - 1) * per_page:page * per_page] or None]
+
+    def wb_indicators(self, ids, query):
+        date = query.get("date", "")
+        first, _, last = date.partition(":")
+        years = range(int(first), int(last or first) + 1) if first else []
+        indicators = self.fixture["world_bank"]["indicators"]
+        rows = []
+        for indicator in ids:
+            for year in years:
+                for code, value in indicators.get(indicator, {}).get(str(year), {}).items():
+                    rows.append({"indicator": {"id": indicator, "value": indicator},
+                                 "country": {"id": code[:2], "value": code},
+                                 "countryiso3code": code, "date": str(year), "value": value,
+                                 "unit": "", "obs_status": "", "decimal": 0})
+        return self.wb_page(rows, query)
+
+    def route(self, path, query):
+        """Response body for path, or None for an unknown endpoint."""
+        if path.rstrip("/") == "/v6/definitions/countries":
+            return self.fixture["climate_trace"]["countries"]
+        if path.rstrip("/") == "/v6/country/emissions":
+            return self.ct_emissions(query)
+        if path.rstrip("/") == "/v2/country":
+            return self.wb_page(self.fixture["world_bank"]["countries"], query)
+        if path.startswith("/v2/countries/all/indicators/"):
+            return self.wb_indicators(path.rsplit("/", 1)[1].split(";"), query)
+        return None
+
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, body, status=200, headers=None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            status = api.admit()
+            if status == 429:
+                return self.send_json({"message": "Too many requests"}, 429, {"Retry-After": "1"})
+            if status is not None:
+                return self.send_json({"message": "Injected failure"}, status)
+
+            url = urlsplit(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            try:
+                body = api.route(url.path, query)
+            except (KeyError, ValueError) as e:
+                return self.send_json({"message": f"Bad request: {e}"}, 400)
+            if body is None:
+                return self.send_json({"message": "Not found"}, 404)
+            self.send_json(body)
+
+    return Handler
+
+
+def start_server(api, host="127.0.0.1", port=0):
+    """Serve api on a background thread; returns the server and its base URL (without /v6 or /v2)."""
+    server = ThreadingHTTPServer((host, port), make_handler(api))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def load_fixture(path=None, n_countries=250):
+    if path:
+        with open(path) as f:
+            return json.load(f)
+    return synthetic_fixture(n_countries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Climate Trace / World Bank API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run the mock server")
+    serve.add_argument("--port", type=int, default=8099)
+    serve.add_argument("--fixture", help="Recorded fixture (default: synthetic)")
+    serve.add_argument("--countries", type=int, default=250, help="Countries in the synthetic fixture")
+    serve.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    serve.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- seconds around the latency")
+    serve.add_argument("--tail_rate", type=float, default=0.0, help="Fraction of responses that are slow")
+    serve.add_argument("--tail_latency", type=float, default=0.0, help="Seconds a slow response takes")
+    serve.add_argument("--rate_limit", type=float, nargs=2, metavar=("RATE", "BURST"),
+                       help="Answer 429 above RATE requests/second (burst BURST)")
+    serve.add_argument("--failure_rate", type=float, default=0.0, help="Fraction of requests that fail")
+    serve.add_argument("--failure_status", type=int, default=503)
+    serve.add_argument("--range_years", action="store_true",
+                       help="Return multi-year emission windows per year (with 'year') instead of summed")
+
+    record = commands.add_parser("record", help="Record a fixture from the real APIs")
+    record.add_argument("path")
+    record.add_argument("--years", type=int, nargs="+", required=True)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record_fixture(args.path, args.years)
+        return
+
+    api = MockAPI(load_fixture(args.fixture, args.countries), latency=args.latency, jitter=args.jitter,
+                  rate_limit=tuple(args.rate_limit) if args.rate_limit else None,
+                  failure_rate=args.failure_rate, failure_status=args.failure_status,
+                  tail_rate=args.tail_rate, tail_latency=args.tail_latency, range_years=args.range_years)
+    server, base_url = start_server(api, port=args.port)
+    print(f"Serving on {base_url} (CLIMATE_TRACE_API_URL={base_url}/v6 WORLD_BANK_API_URL={base_url}/v2)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
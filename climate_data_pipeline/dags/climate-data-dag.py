@@ -1,9 +1,10 @@
 from datetime import datetime, timedelta
 import os
 from airflow import DAG
-from airflow.operators.python import PythonOperator
+from airflow.operators.python import ShortCircuitOperator
 from airflow.providers.google.cloud.transfers.local_to_gcs import LocalFilesystemToGCSOperator
 from airflow.providers.google.cloud.operators.bigquery import BigQueryCreateExternalTableOperator
+from airflow.providers.google.cloud.hooks.gcs import GCSHook
 # Import Variable to store and retrieve configuration
 from airflow.models import Variable
 import json
@@ -12,6 +13,8 @@ import json
 import sys
 sys.path.append(os.path.join(os.environ.get('AIRFLOW_HOME', ''), 'scripts'))
 from data_extractor import run_world_bank_pipeline, run_climate_trace_pipeline
+from landing_format import landing_extensions
+from object_store import GCSStore
 
 
 # Define default arguments
@@ -29,9 +32,47 @@ DATA_DIR = os.path.join(os.environ.get('AIRFLOW_HOME', ''), 'data')
 WORLD_BANK_DIR = os.path.join(DATA_DIR, 'world_bank')
 CLIMATE_TRACE_DIR = os.path.join(DATA_DIR, 'climate_trace')
 
+# With response_cache, API responses are cached locally so re-runs and retries
+# of this DAG are mostly served from disk (off by default)
+if Variable.get("response_cache", default_var="false").lower() == "true":
+    os.environ.setdefault('EXTRACTOR_CACHE_PATH', os.path.join(DATA_DIR, 'http_cache', 'responses.sqlite'))
+
+# Country lists are shared by every year's extraction tasks
+os.environ.setdefault('EXTRACTOR_COUNTRY_CACHE_DIR', os.path.join(DATA_DIR, 'country_cache'))
+
+# Per-task request metrics (JSON and Prometheus textfile) for tuning batch sizes and concurrency
+os.environ.setdefault('EXTRACTOR_METRICS_DIR', os.path.join(DATA_DIR, 'metrics'))
+
+# With response_archive, the raw API responses of every extracted year are kept so outputs
+# can be rebuilt with data_extractor.py --replay (off by default)
+if Variable.get("response_archive", default_var="false").lower() == "true":
+    os.environ.setdefault('EXTRACTOR_ARCHIVE_DIR', os.path.join(DATA_DIR, 'raw_archive'))
+
 # Define GCS bucket
 GCS_BUCKET = 'zoomcamp-climate-trace'
 
+# Landing format of extracted files: "csv", "parquet" (typed, zstd-compressed) or "both"
+LANDING_FORMAT = Variable.get("landing_format", default_var="csv")
+
+# With direct_upload the extraction tasks upload each year to the bucket from memory
+# (resumable for large files) and the separate upload tasks are not created
+DIRECT_UPLOAD = Variable.get("direct_upload", default_var="false").lower() == "true"
+
+def get_landing_bucket():
+    return GCSStore(GCS_BUCKET, client=GCSHook(gcp_conn_id='google_cloud_default').get_conn())
+
+def get_object_store():
+    """The landing bucket when uploading directly, else None (files are written locally)."""
+    return get_landing_bucket() if DIRECT_UPLOAD else None
+
+def get_upload_store():
+    """
+    The bucket the upload tasks write to, when they are used. An unchanged year
+    is then only skipped once its files are in the bucket, so a failed upload
+    is retried by the next run instead of being short-circuited forever.
+    """
+    return None if DIRECT_UPLOAD else get_landing_bucket()
+
 # Get the years to process
 # Default to current year if the variable doesn't exist
 current_year = datetime.now().year
@@ -92,13 +133,17 @@ dag = DAG(
 )
 
 # Function generators for dynamic task creation
+# Extraction tasks short-circuit (skipping the upload) when a year's content
+# is identical to the last extraction, so most runs only upload recent years
 def generate_extract_world_bank_task(year):
     """Generate a task to extract World Bank data for a specific year"""
     
     def extract_world_bank_data(year, **kwargs):
-        return run_world_bank_pipeline(year, WORLD_BANK_DIR)
+        return run_world_bank_pipeline(year, WORLD_BANK_DIR, skip_unchanged=True,
+                                       landing_format=LANDING_FORMAT, object_store=get_object_store(),
+                                       upload_store=get_upload_store())
     
-    return PythonOperator(
+    return ShortCircuitOperator(
         task_id=f'extract_world_bank_data_{year}',
         python_callable=extract_world_bank_data,
         op_kwargs={'year': year},
@@ -109,34 +154,40 @@ def generate_extract_climate_trace_task(year):
     """Generate a task to extract Climate Trace data for a specific year"""
     
     def extract_climate_trace_data(year, **kwargs):
-        return run_climate_trace_pipeline(year, CLIMATE_TRACE_DIR)
+        return run_climate_trace_pipeline(year, CLIMATE_TRACE_DIR, skip_unchanged=True,
+                                          landing_format=LANDING_FORMAT, object_store=get_object_store(),
+                                          upload_store=get_upload_store())
     
-    return PythonOperator(
+    return ShortCircuitOperator(
         task_id=f'extract_climate_trace_data_{year}',
         python_callable=extract_climate_trace_data,
         op_kwargs={'year': year},
         dag=dag,
     )
 
-def generate_upload_world_bank_task(year):
+def generate_upload_world_bank_task(year, ext='.csv'):
     """Generate a task to upload World Bank data to GCS for a specific year"""
     
+    # CSV keeps the original task id; other formats get a suffix
+    suffix = '' if ext == '.csv' else f'_{ext.lstrip(".")}'
     return LocalFilesystemToGCSOperator(
-        task_id=f'upload_world_bank_to_gcs_{year}',
-        src=f"{WORLD_BANK_DIR}/world_bank_indicators_{year}.csv",
-        dst=f'world_bank/world_bank_indicators_{year}.csv',
+        task_id=f'upload_world_bank_to_gcs_{year}{suffix}',
+        src=f"{WORLD_BANK_DIR}/world_bank_indicators_{year}{ext}",
+        dst=f'world_bank/world_bank_indicators_{year}{ext}',
         bucket=GCS_BUCKET,
         gcp_conn_id='google_cloud_default',
         dag=dag,
     )
 
-def generate_upload_climate_trace_task(year):
+def generate_upload_climate_trace_task(year, ext='.csv'):
     """Generate a task to upload Climate Trace data to GCS for a specific year"""
     
+    # CSV keeps the original task id; other formats get a suffix
+    suffix = '' if ext == '.csv' else f'_{ext.lstrip(".")}'
     return LocalFilesystemToGCSOperator(
-        task_id=f'upload_climate_trace_to_gcs_{year}',
-        src=f"{CLIMATE_TRACE_DIR}/global_emissions_{year}.csv",
-        dst=f'climate_trace/global_emissions_{year}.csv',
+        task_id=f'upload_climate_trace_to_gcs_{year}{suffix}',
+        src=f"{CLIMATE_TRACE_DIR}/global_emissions_{year}{ext}",
+        dst=f'climate_trace/global_emissions_{year}{ext}',
         bucket=GCS_BUCKET,
         gcp_conn_id='google_cloud_default',
         dag=dag,
@@ -148,10 +199,15 @@ for year in EXTRACTION_YEARS:
     extract_wb_task = generate_extract_world_bank_task(year)
     extract_ct_task = generate_extract_climate_trace_task(year)
     
-    # Create upload tasks
-    upload_wb_task = generate_upload_world_bank_task(year)
-    upload_ct_task = generate_upload_climate_trace_task(year)
-    
-    # Set dependencies for this year's tasks
-    extract_wb_task >> upload_wb_task
-    extract_ct_task >> upload_ct_task
\ No newline at end of file
+    # Extraction already wrote to the bucket
+    if DIRECT_UPLOAD:
+        continue
+
+    # Create upload tasks, one per landed file format
+    for ext in landing_extensions(LANDING_FORMAT):
+        upload_wb_task = generate_upload_world_bank_task(year, ext)
+        upload_ct_task = generate_upload_climate_trace_task(year, ext)
+
+        # Set dependencies for this year's tasks
+        extract_wb_task >> upload_wb_task
+        extract_ct_task >> upload_ct_task
\ No newline at end of file
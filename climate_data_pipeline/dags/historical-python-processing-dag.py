@@ -29,6 +29,15 @@ default_args = {
 GCS_BUCKET = "zoomcamp-climate-trace"  # Update this to your bucket name
 GCS_PATH = f"gs://{GCS_BUCKET}"
 
+# Read the typed Parquet landing files when the extraction DAG writes them
+LANDING_EXT = '.parquet' if Variable.get("landing_format", default_var="csv") in ('parquet', 'both') else '.csv'
+
+# With incremental_combine the combined dataset is kept as one Parquet file per year and only
+# years whose processed inputs changed are re-merged; the BigQuery table reads all of them
+INCREMENTAL_COMBINE = Variable.get("incremental_combine", default_var="false").lower() == "true"
+COMBINED_URIS = ([f"{GCS_PATH}/processed/combined/*.parquet"] if INCREMENTAL_COMBINE
+                 else [f"{GCS_PATH}/processed/combined/combined_data.parquet"])
+
 # Define BigQuery dataset
 BQ_DATASET = 'zoomcamp_climate_warehouse'
 BQ_PROJECT = Variable.get("gcp_project")  # Make sure this variable exists in Airflow
@@ -100,7 +109,7 @@ def create_wb_processing_task(year):
         task_id=f'process_world_bank_data_{year}',
         python_callable=process_world_bank_data,
         op_kwargs={
-            'input_path': f"{GCS_PATH}/world_bank/world_bank_indicators_{year}.csv",
+            'input_path': f"{GCS_PATH}/world_bank/world_bank_indicators_{year}{LANDING_EXT}",
             'output_path': f"{GCS_PATH}/processed/world_bank"
         },
         dag=dag,
@@ -112,7 +121,7 @@ def create_ct_processing_task(year):
         task_id=f'process_climate_trace_data_{year}',
         python_callable=process_climate_trace_data,
         op_kwargs={
-            'input_path': f"{GCS_PATH}/climate_trace/global_emissions_{year}.csv",
+            'input_path': f"{GCS_PATH}/climate_trace/global_emissions_{year}{LANDING_EXT}",
             'output_path': f"{GCS_PATH}/processed/climate_trace"
         },
         dag=dag,
@@ -188,7 +197,8 @@ combine_data = PythonOperator(
     op_kwargs={
         'world_bank_path': f"{GCS_PATH}/processed/world_bank",
         'climate_trace_path': f"{GCS_PATH}/processed/climate_trace",
-        'output_path': f"{GCS_PATH}/processed/combined"
+        'output_path': f"{GCS_PATH}/processed/combined",
+        'incremental': INCREMENTAL_COMBINE
     },
     dag=dag,
     trigger_rule=TriggerRule.ALL_DONE,  # Run even if previous tasks fail
@@ -205,7 +215,7 @@ create_combined_bq_table = BigQueryCreateExternalTableOperator(
         },
         'externalDataConfiguration': {
             'sourceFormat': 'PARQUET',
-            'sourceUris': [f"{GCS_PATH}/processed/combined/combined_data.parquet"],
+            'sourceUris': COMBINED_URIS,
             'autodetect': True
         },
     },
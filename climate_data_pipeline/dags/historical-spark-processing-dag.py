@@ -27,6 +27,9 @@ default_args = {
 # Get processing year from a parameter
 PROCESSING_YEAR = Variable.get("processing_year", default_var="2016")
 
+# Read the typed Parquet landing files when the extraction DAG writes them
+LANDING_EXT = '.parquet' if Variable.get("landing_format", default_var="csv") in ('parquet', 'both') else '.csv'
+
 # Define GCS and BigQuery configurations
 GCS_BUCKET = 'zoomcamp-climate-trace'
 BQ_DATASET = 'zoomcamp_climate_raw'
@@ -57,8 +60,8 @@ def check_file_exists(bucket_name, object_name):
 # Function to choose the appropriate processing path based on file existence
 def choose_processing_path(**kwargs):
     """Choose which processing paths to follow based on file existence"""
-    world_bank_file = f"world_bank/world_bank_indicators_{PROCESSING_YEAR}.csv"
-    climate_trace_file = f"climate_trace/global_emissions_{PROCESSING_YEAR}.csv"
+    world_bank_file = f"world_bank/world_bank_indicators_{PROCESSING_YEAR}{LANDING_EXT}"
+    climate_trace_file = f"climate_trace/global_emissions_{PROCESSING_YEAR}{LANDING_EXT}"
 
     paths = []
 
@@ -94,7 +97,7 @@ process_wb_data = PythonOperator(
     task_id='process_world_bank_data',
     python_callable=process_world_bank_data,
     op_kwargs={
-        'input_path': f"gs://{GCS_BUCKET}/world_bank/world_bank_indicators_{PROCESSING_YEAR}.csv",
+        'input_path': f"gs://{GCS_BUCKET}/world_bank/world_bank_indicators_{PROCESSING_YEAR}{LANDING_EXT}",
         'output_path': WORLD_BANK_PROCESSED
     },
     dag=dag,
@@ -104,7 +107,7 @@ process_ct_data = PythonOperator(
     task_id='process_climate_trace_data',
     python_callable=process_climate_trace_data,
     op_kwargs={
-        'input_path': f"gs://{GCS_BUCKET}/climate_trace/global_emissions_{PROCESSING_YEAR}.csv",
+        'input_path': f"gs://{GCS_BUCKET}/climate_trace/global_emissions_{PROCESSING_YEAR}{LANDING_EXT}",
         'output_path': CLIMATE_TRACE_PROCESSED
     },
     dag=dag,
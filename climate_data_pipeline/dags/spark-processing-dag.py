@@ -25,6 +25,9 @@ default_args = {
 current_year = datetime.now().year
 EXTRACTION_YEAR = Variable.get("extraction_year", default_var=current_year)
 
+# Read the typed Parquet landing files when the extraction DAG writes them
+LANDING_EXT = '.parquet' if Variable.get("landing_format", default_var="csv") in ('parquet', 'both') else '.csv'
+
 # Define GCS and BigQuery configurations
 # Use the same bucket and ds as your extraction DAG
 
@@ -63,7 +66,7 @@ process_wb_data = PythonOperator(
     task_id='process_world_bank_data',
     python_callable=process_world_bank_data,
     op_kwargs={
-        'input_path': f"gs://{GCS_BUCKET}/world_bank/world_bank_indicators_{EXTRACTION_YEAR}.csv",
+        'input_path': f"gs://{GCS_BUCKET}/world_bank/world_bank_indicators_{EXTRACTION_YEAR}{LANDING_EXT}",
         'output_path': WORLD_BANK_PROCESSED
     },
     dag=dag,
@@ -73,7 +76,7 @@ process_ct_data = PythonOperator(
     task_id='process_climate_trace_data',
     python_callable=process_climate_trace_data,
     op_kwargs={
-        'input_path': f"gs://{GCS_BUCKET}/climate_trace/global_emissions_{EXTRACTION_YEAR}.csv",
+        'input_path': f"gs://{GCS_BUCKET}/climate_trace/global_emissions_{EXTRACTION_YEAR}{LANDING_EXT}",
         'output_path': CLIMATE_TRACE_PROCESSED
     },
     dag=dag,
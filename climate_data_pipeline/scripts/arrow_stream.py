@@ -0,0 +1,207 @@
+import codecs
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import pyarrow as pa
+
+# Drop the consumed part of the text buffer once it grows past this many characters
+COMPACT_AFTER = 1 << 16
+
+_WHITESPACE = " \t\n\r"
+
+
+class JsonArrayStream:
+    """
+    Incrementally yields the items of a JSON array from a stream of chunks.
+
+    path selects which array to stream: () is the top-level array, (1,) is
+    the second element of the top-level array (the World Bank layout
+    [metadata, [records...]]). Elements before the selected one are decoded
+    whole and kept in self.siblings, so the metadata is available as soon as
+    the first record is yielded. Only one item is held in memory at a time.
+    """
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]], path: Sequence[int] = ()):
+        self.chunks = iter(chunks)
+        self.path = tuple(path)
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.siblings: Dict[int, Any] = {}
+
+    def _read_more(self) -> bool:
+        """Append the next chunk to the buffer; False once the input is exhausted."""
+        if self.eof:
+            return False
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            self.eof = True
+            self.buffer += self.text_decoder.decode(b"", final=True)
+            return False
+
+        if isinstance(chunk, bytes):
+            chunk = self.text_decoder.decode(chunk)
+        if self.pos > COMPACT_AFTER:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        self.buffer += chunk
+        return True
+
+    def _peek(self) -> Optional[str]:
+        """Skip whitespace and return the next character without consuming it (None at EOF)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read_more():
+                return None
+
+    def _expect(self, char: str):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, found {found!r}")
+        self.pos += 1
+
+    def _decode_value(self) -> Any:
+        """Decode one complete JSON value at the current position, reading more input as needed."""
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._read_more():
+                    raise
+                continue
+            # A number or literal ending exactly at the buffer end may be cut off; read on to be sure
+            if end == len(self.buffer) and not self.eof and self._read_more():
+                continue
+            self.pos = end
+            return value
+
+    def _items(self, path: Sequence[int]) -> Iterator[Any]:
+        """Walk the array at the current position, descending along path."""
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return
+
+        index = 0
+        while True:
+            if not path:
+                yield self._decode_value()
+            elif index == path[0]:
+                if self._peek() != "[":
+                    # Not the layout we expected (e.g. an error object); nothing to stream
+                    self.siblings[index] = self._decode_value()
+                else:
+                    yield from self._items(path[1:])
+            else:
+                self.siblings[index] = self._decode_value()
+
+            separator = self._peek()
+            self.pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON stream, found {separator!r}")
+            index += 1
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._peek() != "[":
+            # Not an array at all (e.g. an error object): keep it for the caller and yield nothing
+            self.siblings[0] = self._decode_value() if self._peek() is not None else None
+            return iter(())
+        return self._items(self.path)
+
+
+class CountingChunks:
+    """Iterates a streamed response body in chunks, counting the bytes received."""
+
+    def __init__(self, response, chunk_size: int = 1 << 16):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.bytes = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self.response.iter_content(chunk_size=self.chunk_size):
+            self.bytes += len(chunk)
+            yield chunk
+
+
+class ArrowBatchBuilder:
+    """
+    Appends rows into per-column value lists and emits Arrow record batches.
+
+    Columns in schema get their declared type; columns first seen in the data
+    get default_type and are back-filled with nulls. Every batch_size rows
+    the lists are converted into a RecordBatch and start over, so only up to
+    batch_size rows are held as Python objects. The batches themselves are
+    kept until finish(), so a response still costs its size in Arrow memory.
+    Rows of a fixed schema can be appended positionally with append_values,
+    without building a dict per row.
+    """
+
+    def __init__(self, schema: Dict[str, pa.DataType], batch_size: int = 10_000,
+                 default_type: pa.DataType = pa.float64()):
+        self.types = dict(schema)
+        self.batch_size = batch_size
+        self.default_type = default_type
+        self.columns: Dict[str, List[Any]] = {name: [] for name in self.types}
+        self.length = 0
+        self.batches: List[pa.RecordBatch] = []
+
+    def append(self, row: Dict[str, Any]):
+        for name, value in row.items():
+            values = self.columns.get(name)
+            if values is None:
+                self.types[name] = self.default_type
+                values = self.columns[name] = [None] * self.length
+            values.append(value)
+
+        self.length += 1
+        for values in self.columns.values():
+            if len(values) < self.length:
+                values.append(None)
+
+        if self.length >= self.batch_size:
+            self.flush()
+
+    def append_values(self, *values: Any):
+        """Append one row given as values in column order; later columns are null."""
+        columns = list(self.columns.values())
+        if len(values) > len(columns):
+            raise ValueError(f"Expected at most {len(columns)} values, got {len(values)}")
+        for column, value in zip(columns, values):
+            column.append(value)
+        for column in columns[len(values):]:
+            column.append(None)
+
+        self.length += 1
+        if self.length >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Convert the buffered rows into a RecordBatch."""
+        if self.length == 0:
+            return
+        arrays = [pa.array(values, type=self.types[name]) for name, values in self.columns.items()]
+        self.batches.append(pa.RecordBatch.from_arrays(arrays, names=list(self.columns)))
+        self.columns = {name: [] for name in self.columns}
+        self.length = 0
+
+    def finish(self) -> List[pa.RecordBatch]:
+        """Flush the remaining rows and return every batch produced so far."""
+        self.flush()
+        batches, self.batches = self.batches, []
+        return batches
+
+
+def batches_to_table(batches: List[pa.RecordBatch]) -> pa.Table:
+    """Combine record batches whose column sets may differ into one table."""
+    if not batches:
+        return pa.table({})
+    return pa.concat_tables([pa.Table.from_batches([batch]) for batch in batches], promote_options="default")
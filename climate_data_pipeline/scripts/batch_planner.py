@@ -0,0 +1,205 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fetch_engine import gather_limited, DEFAULT_MAX_IN_FLIGHT
+
+# Status codes that mean "the batch was too big or the server struggled with it"
+SHRINK_STATUSES = {413, 414, 500, 502, 503, 504}
+
+
+class BatchResult:
+    """Outcome of a single batch request, as reported to the planner."""
+
+    def __init__(self, data: Optional[List[Any]], status: Optional[int], latency: float, payload_bytes: int = 0):
+        self.data = data
+        self.status = status  # None means the request never got a response (timeout, connection error)
+        self.latency = latency
+        self.payload_bytes = payload_bytes
+
+    @property
+    def ok(self) -> bool:
+        return self.data is not None
+
+
+class BatchPlanner:
+    """
+    Sizes batches of country codes from observed request behaviour.
+
+    The size grows multiplicatively while responses are fast and small, is
+    halved when a batch fails with a "too big" style error, and never lets a
+    request URL exceed max_url_length. The tuned size is remembered in a
+    small JSON state file so the next run starts from it.
+    """
+
+    def __init__(self, name: str, initial_size: int = 20, min_size: int = 1, max_size: int = 250,
+                 max_url_length: int = 2000, target_latency: float = 2.0,
+                 max_payload_bytes: int = 2_000_000, growth: float = 1.5,
+                 state_path: Optional[str] = None):
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_url_length = max_url_length
+        self.target_latency = target_latency
+        self.max_payload_bytes = max_payload_bytes
+        self.growth = growth
+        self.state_path = state_path
+        self.size = self._load_size(initial_size)
+
+    def _clamp(self, size: float) -> int:
+        return int(max(self.min_size, min(self.max_size, size)))
+
+    def _load_size(self, default: int) -> int:
+        """Read the tuned size from the state file, if there is one."""
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path) as f:
+                    state = json.load(f)
+                if self.name in state:
+                    print(f"Starting {self.name} with remembered batch size {state[self.name]}")
+                    return self._clamp(state[self.name])
+            except (OSError, ValueError) as e:
+                print(f"Could not read batch planner state {self.state_path}: {e}")
+        return self._clamp(default)
+
+    def save(self):
+        """Persist the tuned size so the next run starts from it."""
+        if not self.state_path:
+            return
+
+        state = {}
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path) as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = {}
+        state[self.name] = self.size
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def take(self, items: Sequence[str], url_prefix_length: int = 0) -> int:
+        """
+        Return how many of items (from the start) fit in the next batch.
+
+        The count is bounded by the current size and by the URL length budget,
+        where each item costs its own length plus one separator.
+        """
+        count = 0
+        url_length = url_prefix_length
+        for item in items[:self.size]:
+            url_length += len(item) + 1
+            if count and url_length > self.max_url_length:
+                break
+            count += 1
+        return max(1, count) if items else 0
+
+    def record(self, batch_size: int, result: BatchResult):
+        """Adjust the batch size from the outcome of a batch of batch_size items."""
+        if not result.ok:
+            if result.status is None or result.status in SHRINK_STATUSES:
+                self.size = self._clamp(min(self.size, batch_size // 2))
+            return
+
+        if result.latency > self.target_latency or result.payload_bytes > self.max_payload_bytes:
+            self.size = self._clamp(min(self.size, batch_size * 0.75))
+        elif (batch_size >= self.size
+              and result.latency < self.target_latency / 2
+              and result.payload_bytes * self.growth < self.max_payload_bytes):
+            self.size = self._clamp(self.size * self.growth)
+
+
+def run_adaptive_batches(fetch_batch: Callable[[List[str], Any], BatchResult],
+                         groups: Sequence[Tuple[Any, List[str]]],
+                         planner: BatchPlanner,
+                         max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                         url_prefix_length: int = 0) -> Dict[Any, List[Any]]:
+    """
+    Fetch every item of every group in planner-sized batches.
+
+    groups is a list of (key, items) pairs, e.g. (year, country_codes).
+    Batches are sent in waves of up to max_in_flight requests; the planner is
+    updated after each wave so the next wave uses the new size. A batch that
+    fails with a shrinkable error is split in half and retried, so one
+    oversized batch does not lose all of its countries.
+
+    Returns a dict of key -> concatenated data, in item order within a key.
+    """
+    if not groups:
+        return {}
+    return asyncio.run(adaptive_batches(fetch_batch, groups, planner, max_in_flight, url_prefix_length))
+
+
+async def adaptive_batches(fetch_batch: Callable[[List[str], Any], BatchResult],
+                           groups: Sequence[Tuple[Any, List[str]]],
+                           planner: BatchPlanner,
+                           max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                           url_prefix_length: int = 0,
+                           gather: Optional[Callable] = None) -> Dict[Any, List[Any]]:
+    """
+    Coroutine behind run_adaptive_batches, for callers that already run an event loop.
+
+    gather(func, jobs, max_in_flight) runs one wave and returns its results
+    in job order; it defaults to gather_limited, and the extraction engine
+    passes its per-host scheduler instead.
+    """
+    gather = gather or gather_limited
+
+    # Each pending entry is (key, position, items). Positions are tuples that sort in
+    # item order: a taken chunk keeps its position, the untaken remainder gets
+    # position + (1,) and the halves of a failed chunk get position + (0, 0) / (0, 1).
+    pending = deque()
+    for key, items in groups:
+        pending.append((key, (0,), list(items)))
+
+    collected = {key: [] for key, _ in groups}
+    requests_sent = 0
+
+    while pending:
+        # Build one wave of batches from the pending work
+        wave = []
+        while pending and len(wave) < max(1, max_in_flight):
+            key, position, items = pending.popleft()
+            count = planner.take(items, url_prefix_length)
+            wave.append((key, position, items[:count]))
+            if count < len(items):
+                pending.appendleft((key, position + (1,), items[count:]))
+
+        started = time.time()
+        results = await gather(fetch_batch, [(items, key) for key, _, items in wave], max_in_flight)
+        requests_sent += len(wave)
+
+        retry = []
+        for (key, position, items), result in zip(wave, results):
+            planner.record(len(items), result)
+            if result.ok:
+                collected[key].append((position, result.data))
+            elif len(items) > 1 and (result.status is None or result.status in SHRINK_STATUSES):
+                half = len(items) // 2
+                print(f"Batch of {len(items)} failed with status {result.status}; retrying as two smaller batches")
+                retry.append((key, position + (0, 0), items[:half]))
+                retry.append((key, position + (0, 1), items[half:]))
+            else:
+                print(f"Giving up on batch {items} (status {result.status})")
+
+        # Retries go to the front so a group finishes before moving on
+        pending.extendleft(reversed(retry))
+        print(f"Wave of {len(wave)} batches took {time.time() - started:.2f}s; "
+              f"next batch size {planner.size}")
+
+    planner.save()
+    print(f"Sent {requests_sent} batch requests; tuned batch size is {planner.size}")
+
+    output = {}
+    for key, parts in collected.items():
+        output[key] = []
+        for _, data in sorted(parts, key=lambda part: part[0]):
+            output[key].extend(data)
+    return output
@@ -1,152 +1,116 @@
-import os
 import sys
-import requests
-import pandas as pd
 import argparse
-from typing import List, Dict, Union, Any
+from typing import List
+from urllib.parse import urlsplit
+
+from fetch_engine import DEFAULT_MAX_IN_FLIGHT
+from http_transport import HttpTransport
+from country_registry import CountryRegistry
+from data_extractor import extract_years
+from landing_format import LANDING_FORMATS
+from object_store import ObjectStore, store_from_uri
+from extraction_metrics import write_run_metrics
+from extraction_sources import CLIMATE_TRACE_API, CLIMATE_TRACE_BATCH_DEADLINE, climate_trace_source
+from response_archive import ResponseArchive, archive_from_env
 
 class ClimateTraceExtractor:
-    BASE_URL = "https://api.climatetrace.org/v6"
+    """
+    Climate Trace emissions for a range of years, one file per year.
+
+    A thin wrapper over the extraction engine: requests, batching,
+    checkpoints, hedging and the response archive are those of the
+    climate_trace source in extraction_sources, run for every year at once.
+    """
+    BASE_URL = CLIMATE_TRACE_API
     OUTPUT_DIR = "climate_trace_emissions_data"
 
-    def __init__(self, since_year: int, to_year: int = None):
-        # Ensure output directory exists
-        os.makedirs(self.OUTPUT_DIR, exist_ok=True)
-
+    def __init__(self, since_year: int, to_year: int = None, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 range_mode: bool = False, transport: HttpTransport = None,
+                 country_registry: CountryRegistry = None, streaming: bool = False, landing_format: str = "csv",
+                 object_store: ObjectStore = None, hedge_budget: float = None,
+                 batch_deadline: float = CLIMATE_TRACE_BATCH_DEADLINE, archive: ResponseArchive = None):
         # If to_year is not provided, use since_year
         self.since_year = since_year
         self.to_year = to_year or since_year
 
-    def get_countries(self) -> List[Dict]:
-        """Retrieve list of countries from Climate Trace API."""
-        try:
-            response = requests.get(f"{self.BASE_URL}/definitions/countries/")
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            print(f"Error fetching countries: {e}")
-            return []
-
-    def fetch_emissions_data(self, country_codes: List[str], year: int) -> List[Dict]:
-        """Fetch emissions data for specific countries and year."""
-        # Build the base URL
-        base_url = f"{self.BASE_URL}/country/emissions"
-
-        # Create URL with properly formatted country list (not using params to avoid URL encoding of commas)
-        countries_str = ",".join(country_codes)
-        url = f"{base_url}?since={year}&to={year+1}&countries={countries_str}"
-
-        try:
-            # Make the request with the manually formatted URL
-            print(f"Full request URL: {url}")
-            response = requests.get(url)
-            print(f"Response status: {response.status_code}")
-            print(f"Response content: {response.text[:500]}...")
-
-            response.raise_for_status()
-            return response.json()
-
-        except requests.RequestException as e:
-            print(f"Error fetching emissions data: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Error response: {e.response.text}")
-            return []
-
-    def process_emissions_data(self, data: List[Dict]) -> pd.DataFrame:
-        """
-        Process emissions data into a DataFrame with countries as rows 
-        and emission types as columns.
-        """
-        countries_data = []
-        
-        # Extract data for each country
-        for item in data:
-            if not isinstance(item, dict):
-                continue
-                
-            country_code = item.get('country')
-            emissions = item.get('emissions', {})
-            
-            if not country_code or not emissions:
-                continue
-                
-            # Create a row for this country
-            country_row = {'country': country_code}
-            
-            # Add emissions values as columns
-            for emission_type, value in emissions.items():
-                country_row[emission_type] = value
-                
-            countries_data.append(country_row)
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(countries_data)
-        
-        return df
-
-    def save_year_data(self, year: int, data: pd.DataFrame):
+        # Maximum number of batch requests running at the same time (hedges included)
+        self.max_in_flight = max_in_flight
+
+        # In range mode each batch asks for a multi-year window and is split per year locally;
+        # in streaming mode responses are parsed incrementally into Arrow record batches
+        self.source = climate_trace_source(range_mode=range_mode, streaming=streaming, deadline=batch_deadline)
+
+        # Output files: "csv", "parquet" (typed, zstd-compressed) or "both"
+        self.landing_format = landing_format
+
+        # When set, years are uploaded from memory to <source>/<file> in this store instead of written locally
+        self.object_store = object_store
+
+        # Optional hedged duplicates for batches slower than the recent p95, capped at hedge_budget extra requests
+        self.hedge_budget = hedge_budget
+
+        # Shared transport and country cache unless given; raw responses archived to EXTRACTOR_ARCHIVE_DIR when set
+        self.transport = transport
+        self.country_registry = country_registry
+        self.archive = archive or archive_from_env()
+
+    def extract_emissions_by_year(self, replay: bool = False) -> List[int]:
         """
-        Save emissions data for a specific year to CSV.
-        
-        :param year: Year of emissions data
-        :param data: DataFrame with countries as rows and emission types as columns
+        Extract emissions data for each year, or rebuild it from the response archive with replay.
+
+        Returns the years that could not be completed; they are not written
+        and a rerun fetches only their missing batches.
         """
-        # Create output directory
-        os.makedirs(self.OUTPUT_DIR, exist_ok=True)
-
-        # Filename for the year
-        filename = os.path.join(self.OUTPUT_DIR, f"global_emissions_{year}.csv")
-
-        # Save to CSV
-        if not data.empty:
-            data.to_csv(filename, index=False)
-            print(f"Saved emissions data for {year} to {filename}")
-        else:
-            print(f"No data available for {year}")
-
-    def extract_emissions_by_year(self):
-        """Extract emissions data for each year."""
-        # Get all countries
-        countries = self.get_countries()
-        country_codes = [country['alpha3'] for country in countries]
-        
-        print(f"Found {len(country_codes)} countries")
-        
-        # Process each year
-        for year in range(self.since_year, self.to_year + 1):
-            print(f"Processing emissions data for year {year}...")
-            
-            # Due to API limitations, we may need to process countries in batches
-            batch_size = 20  # Adjust based on API limitations
-            all_data = []
-            
-            for i in range(0, len(country_codes), batch_size):
-                batch_countries = country_codes[i:i+batch_size]
-                print(f"Processing batch of {len(batch_countries)} countries...")
-                
-                data = self.fetch_emissions_data(batch_countries, year)
-                if data:
-                    all_data.extend(data)
-            
-            # Process and save data for this year
-            df = self.process_emissions_data(all_data)
-            self.save_year_data(year, df)
+        years = list(range(self.since_year, self.to_year + 1))
+        incomplete = extract_years(self.source, years, self.OUTPUT_DIR, self.landing_format, self.object_store,
+                                   self.archive, replay,
+                                   host_limits={urlsplit(self.BASE_URL).hostname: self.max_in_flight},
+                                   hedge_budget=self.hedge_budget, transport=self.transport,
+                                   country_registry=self.country_registry)
+        if incomplete:
+            print(f"Incomplete years {incomplete}; completed batches are kept in {self.OUTPUT_DIR}/.checkpoints")
+        return incomplete
 
 def main():
     # Set up argument parser
     parser = argparse.ArgumentParser(description="Climate Trace Emissions Data Extractor")
     parser.add_argument("since_year", type=int, help="Starting year for emissions data")
     parser.add_argument("--to_year", type=int, help="Ending year for emissions data (optional)")
-    
+    parser.add_argument("--max_in_flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="Maximum number of concurrent batch requests")
+    parser.add_argument("--range_mode", action="store_true",
+                        help="Request multi-year windows per batch and split them per year locally")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Parse responses incrementally into Arrow record batches")
+    parser.add_argument("--landing_format", choices=LANDING_FORMATS, default="csv",
+                        help="Write each year as CSV, typed Parquet, or both")
+    parser.add_argument("--hedge_budget", type=float,
+                        help="Send hedged duplicates of slow batches, up to this fraction of extra requests (e.g. 0.1)")
+    parser.add_argument("--object_store",
+                        help="Upload each year straight to this store (gs://bucket[/prefix] or a directory)")
+    parser.add_argument("--replay", action="store_true",
+                        help="Rebuild the years from the response archive in EXTRACTOR_ARCHIVE_DIR")
+
     # Parse arguments
     args = parser.parse_args()
 
     # Create extractor and run pipeline
     extractor = ClimateTraceExtractor(
-        since_year=args.since_year, 
-        to_year=args.to_year
+        since_year=args.since_year,
+        to_year=args.to_year,
+        max_in_flight=args.max_in_flight,
+        range_mode=args.range_mode,
+        streaming=args.streaming,
+        landing_format=args.landing_format,
+        object_store=store_from_uri(args.object_store) if args.object_store else None,
+        hedge_budget=args.hedge_budget
     )
-    extractor.extract_emissions_by_year()
+    incomplete = extractor.extract_emissions_by_year(replay=args.replay)
+
+    # Request latency, sizes, retries and rate-limit waits of this run (with EXTRACTOR_METRICS_DIR)
+    write_run_metrics(f"climate_trace_{args.since_year}_{args.to_year or args.since_year}")
+    if incomplete:
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,121 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# Country lists change a few times a year at most
+DEFAULT_TTL = 30 * 24 * 3600
+
+# Field holding the ISO alpha-3 code in each provider's country records
+ALPHA3_FIELDS = {
+    "climate_trace": "alpha3",
+    "world_bank": "id",
+}
+
+
+class CountryList:
+    """A provider's country records plus a precomputed alpha3 index."""
+
+    def __init__(self, provider: str, countries: List[Dict], fetched_at: float):
+        self.provider = provider
+        self.countries = countries
+        self.fetched_at = fetched_at
+
+        field = ALPHA3_FIELDS.get(provider, "alpha3")
+        self.by_alpha3 = {c[field]: c for c in countries if isinstance(c, dict) and c.get(field)}
+        self.alpha3_codes = list(self.by_alpha3)
+
+    def __len__(self) -> int:
+        return len(self.countries)
+
+
+class CountryRegistry:
+    """
+    Memory plus on-disk cache of country definitions, keyed by provider.
+
+    The first lookup in a process reads <cache_dir>/countries_<provider>.json
+    if it is younger than ttl, and only calls the provider's fetch function
+    when it is missing or stale. Every later lookup, for any year or task
+    in the same process, is served from memory.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl: float = DEFAULT_TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.lists: Dict[str, CountryList] = {}
+        self.lock = threading.Lock()
+
+    def _path(self, provider: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"countries_{provider}.json")
+
+    def _read_disk(self, provider: str) -> Optional[CountryList]:
+        path = self._path(provider)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                cached = json.load(f)
+            return CountryList(provider, cached["countries"], cached["fetched_at"])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable country cache {path}: {e}")
+            return None
+
+    def _write_disk(self, country_list: CountryList):
+        path = self._path(country_list.provider)
+        if not path:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"fetched_at": country_list.fetched_at, "countries": country_list.countries}, f)
+        os.replace(tmp_path, path)
+
+    def _is_fresh(self, country_list: Optional[CountryList]) -> bool:
+        return country_list is not None and time.time() - country_list.fetched_at < self.ttl
+
+    def get(self, provider: str, fetch: Callable[[], List[Dict]]) -> CountryList:
+        """Return the provider's countries, calling fetch() only if no fresh copy is cached."""
+        with self.lock:
+            country_list = self.lists.get(provider)
+            if self._is_fresh(country_list):
+                return country_list
+
+            country_list = self._read_disk(provider)
+            if self._is_fresh(country_list):
+                print(f"Using cached {provider} country list ({len(country_list)} countries)")
+                self.lists[provider] = country_list
+                return country_list
+
+            countries = fetch()
+            country_list = CountryList(provider, countries, time.time())
+            # Do not cache a failed (empty) listing
+            if countries:
+                self.lists[provider] = country_list
+                self._write_disk(country_list)
+            return country_list
+
+
+_shared_registry = None
+_shared_lock = threading.Lock()
+
+
+def get_country_registry() -> CountryRegistry:
+    """
+    Return the process-wide registry, creating it on first use.
+
+    The on-disk copy lives in EXTRACTOR_COUNTRY_CACHE_DIR, or in a folder
+    under the system temp directory when that is not set.
+    """
+    global _shared_registry
+    with _shared_lock:
+        if _shared_registry is None:
+            cache_dir = os.environ.get(
+                "EXTRACTOR_COUNTRY_CACHE_DIR",
+                os.path.join(tempfile.gettempdir(), "carbonlens_countries")
+            )
+            _shared_registry = CountryRegistry(cache_dir)
+        return _shared_registry
@@ -1,185 +1,250 @@
-import requests
-import pandas as pd
 import os
-import time
 
-def fetch_world_bank_data(year):
-    """Fetch data from World Bank API directly."""
+from fetch_engine import DEFAULT_MAX_IN_FLIGHT
+from extraction_engine import run_sources, replay_sources
+from extraction_sources import climate_trace_source, world_bank_source, get_sources
+from extraction_manifest import ExtractionManifest
+from landing_format import landing_paths, write_landing, write_landing_to_store
+from object_store import store_from_uri
+from extraction_metrics import get_metrics, write_run_metrics
+from response_archive import ResponseArchive, archive_from_env
+from hedging import hedge_budget_from_env
 
-    # treats year as string
-    # Convert year to integer if it's a string
-    year = int(year) if isinstance(year, str) else year
-    
-    indicators = {
-        'SP.POP.TOTL': 'Population, total',
-        'NY.GDP.PCAP.CD': 'GDP per capita (current US$)',
-        'SI.POV.GAPS': 'Poverty headcount ratio at $2.15 a day (2017 PPP) (% of population)',
-        'SP.DYN.LE00.IN': 'Life expectancy at birth, total (years)',
-        'SE.SEC.ENRR': 'School enrollment, secondary (% gross)',
-        'SI.POV.GINI': 'Gini index (World Bank estimate)',
-        'SL.UEM.TOTL.ZS': 'Unemployment, total (% of total labor force)'
-    }
-    
-    # Get list of countries
-    print("Fetching list of countries from World Bank API")
-    response = requests.get("https://api.worldbank.org/v2/country?format=json&per_page=300")
-    response.raise_for_status()
-    countries_data = response.json()
-    countries = []
-    if len(countries_data) > 1 and isinstance(countries_data[1], list):
-        countries = countries_data[1]
-    
-    # Prepare data container
-    all_data = []
-    
-    # For each indicator, get data for all countries
-    for indicator_code, indicator_name in indicators.items():
-        print(f"Fetching {indicator_name} for {year}...")
-        
-        url = f"https://api.worldbank.org/v2/countries/all/indicators/{indicator_code}"
-        params = {
-            "date": year,
-            "format": "json",
-            "per_page": 300
-        }
-        
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        
-        result = response.json()
-        if len(result) > 1 and isinstance(result[1], list):
-            data = result[1]
-            
-            # Process data
-            for item in data:
-                if not isinstance(item, dict):
-                    continue
-                
-                country_code = item.get('countryiso3code')
-                value = item.get('value')
-                
-                if not country_code or value is None or country_code == '':
-                    continue
-                
-                # Find or create entry for this country
-                country_entry = next((c for c in all_data if c.get('country') == country_code), None)
-                if country_entry is None:
-                    country_entry = {'country': country_code, 'year': year}
-                    all_data.append(country_entry)
-                
-                # Add this indicator
-                country_entry[indicator_code] = value
-        
-        # Add a short delay to avoid API rate limits
-        time.sleep(0.5)
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(all_data)
-    return df
+# Output file name (without extension) and label of each source's extracted years
+OUTPUT_FILES = {
+    "world_bank": ("world_bank_indicators_{year}", "World Bank indicators"),
+    "climate_trace": ("global_emissions_{year}", "Climate Trace emissions"),
+}
 
-def fetch_climate_trace_data(year):
-    """Fetch data from Climate Trace API directly."""
-    
-    # treats year as string
-    # Convert year to integer if it's a string
-    year = int(year) if isinstance(year, str) else year
+def extracted_frame(results, source, year):
+    """Return a source's DataFrame for year from run_sources results, re-raising its failure."""
+    frame = results[source][int(year)]
+    if isinstance(frame, Exception):
+        raise frame
+    return frame
 
+def fetch_world_bank_data(year, multi_indicator=False, state_dir=None):
+    """
+    Fetch data from World Bank API directly.
 
-    # Get list of countries
-    print("Fetching list of countries from Climate Trace API")
-    countries_response = requests.get("https://api.climatetrace.org/v6/definitions/countries/")
-    countries_response.raise_for_status()
-    countries = countries_response.json()
-    country_codes = [country['alpha3'] for country in countries]
-    
-    # Process countries in batches
-    batch_size = 10
-    all_data = []
-    
-    for i in range(0, len(country_codes), batch_size):
-        batch_countries = country_codes[i:i+batch_size]
-        print(f"Processing batch of {len(batch_countries)} countries...")
-        
-        countries_str = ",".join(batch_countries)
-        url = f"https://api.climatetrace.org/v6/country/emissions?since={year}&to={year+1}&countries={countries_str}"
-        
-        response = requests.get(url)
-        if response.status_code != 200:
-            print(f"Error fetching data: {response.status_code}")
-            print(f"Response: {response.text[:500]}")
+    Every completed indicator listing is checkpointed under state_dir, so
+    when a request fails (and the task is retried) only the remaining ones
+    are fetched.
+    """
+    results = run_sources([world_bank_source(multi_indicator)], [year], state_dirs={"world_bank": state_dir})
+    return extracted_frame(results, "world_bank", year)
+
+def fetch_climate_trace_data(year, max_in_flight=DEFAULT_MAX_IN_FLIGHT, state_dir=None):
+    """
+    Fetch data from Climate Trace API directly.
+
+    Completed country batches are checkpointed under state_dir and a rerun
+    only requests the missing countries. Raises RuntimeError while any
+    country is still missing, so an incomplete year is never written.
+    """
+    source = climate_trace_source()
+    results = run_sources([source], [year], state_dirs={"climate_trace": state_dir},
+                          host_limits={"api.climatetrace.org": max_in_flight})
+    return extracted_frame(results, "climate_trace", year)
+
+def save_if_changed(df, source, year, base_path, destination_path, skip_unchanged, landing_format="csv",
+                    object_store=None, upload_store=None):
+    """
+    Write df to base_path in landing_format unless skip_unchanged and the
+    manifest says the year is unchanged.
+
+    With an object_store, base_path is an object key and the files are
+    uploaded from memory instead of written locally; only the manifest stays
+    in destination_path. upload_store is the store a later task uploads the
+    local files to (as <source>/<file>): an unchanged year is then only
+    skipped if its files are there too, so a failed upload is redone.
+    Returns the written path or URI (the Parquet one when both formats are
+    written), or None when the write was skipped. The manifest records the
+    year only once every file was written.
+    """
+    manifest = ExtractionManifest(os.path.join(destination_path, ".extraction_manifest.json"))
+    changed = df.empty or manifest.is_changed(source, int(year), df)
+    paths = landing_paths(base_path, landing_format)
+    exists = object_store.exists if object_store is not None else os.path.exists
+
+    def uploaded(path):
+        return upload_store is None or upload_store.exists(f"{source}/{os.path.basename(path)}")
+
+    if skip_unchanged and not changed and all(exists(path) and uploaded(path) for path in paths):
+        manifest.commit(source, int(year), df)
+        print(f"{source} data for {year} unchanged since the last extraction; skipping {', '.join(paths)}")
+        return None
+
+    if object_store is not None:
+        written = write_landing_to_store(df, object_store, base_path, landing_format, year=int(year))
+    else:
+        written = write_landing(df, base_path, landing_format, year=int(year))
+    if not df.empty:
+        manifest.commit(source, int(year), df)
+    return written[-1]
+
+def run_pipelines(year, destinations, multi_indicator=False, skip_unchanged=False, landing_format="csv",
+                  object_store=None, archive_dir=None, replay=False, upload_store=None):
+    """
+    Extract several sources for one year together and save each to its destination.
+
+    destinations maps source name ("world_bank", "climate_trace") to its
+    output folder. All sources run in one extraction engine run, so this
+    takes as long as the slowest source. Returns source -> written path, or
+    None for a source whose content was unchanged (with skip_unchanged).
+    Successful sources are saved before the first failure is raised.
+
+    object_store (an ObjectStore or a URI such as gs://bucket) uploads each
+    year from memory to <source>/<file> in the store, the layout the DAG's
+    upload tasks use, and the output folders only keep extraction state.
+    When separate tasks upload the local files instead, pass their store as
+    upload_store so unchanged years are only skipped once they are uploaded.
+
+    Request metrics of the run are written to EXTRACTOR_METRICS_DIR (when
+    set) as extract_<sources>_<year>.json and .prom, also for failed runs.
+
+    Raw responses of each completed year are archived to archive_dir
+    (default EXTRACTOR_ARCHIVE_DIR, off when neither is set). With replay,
+    nothing is fetched: the outputs are rebuilt from that archive.
+    EXTRACTOR_HEDGE_BUDGET (e.g. 0.1) turns on hedged requests.
+    """
+    for destination_path in destinations.values():
+        os.makedirs(destination_path, exist_ok=True)
+    if isinstance(object_store, str):
+        object_store = store_from_uri(object_store)
+    archive = ResponseArchive(archive_dir) if archive_dir else archive_from_env()
+    sources = get_sources(list(destinations), multi_indicator=multi_indicator)
+
+    if replay:
+        if archive is None:
+            raise ValueError("Replay needs a response archive (archive_dir or EXTRACTOR_ARCHIVE_DIR)")
+        results = replay_sources(sources, [year], archive)
+    else:
+        # Fetch all sources at once; planner state and checkpoints live next to each output
+        get_metrics().reset()
+        try:
+            results = run_sources(sources, [year], state_dirs=dict(destinations), archive=archive,
+                                  hedge_budget=hedge_budget_from_env())
+        finally:
+            write_run_metrics(f"extract_{'_'.join(destinations)}_{year}")
+
+    outputs = {}
+    errors = []
+    for source, destination_path in destinations.items():
+        try:
+            df = extracted_frame(results, source, year)
+        except Exception as e:
+            print(f"Extracting {source} for {year} failed: {e}")
+            errors.append(e)
             continue
-        
-        data = response.json()
-        
-        for item in data:
-            if not isinstance(item, dict):
-                continue
-            
-            country_code = item.get('country')
-            emissions = item.get('emissions', {})
-            
-            if not country_code or not emissions:
-                continue
-            
-            # Create a row for this country
-            result = {'country': country_code, 'year': year}
-            
-            # Add emissions values
-            for emission_type, value in emissions.items():
-                result[emission_type] = value
-            
-            all_data.append(result)
-        
-        # Add a short delay to avoid API rate limits
-        time.sleep(0.5)
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(all_data)
-    return df
 
-def run_world_bank_pipeline(year, destination_path):
-    """Run the World Bank pipeline and save to local files."""
-    os.makedirs(destination_path, exist_ok=True)
-    
-    # Fetch data directly
-    df = fetch_world_bank_data(year)
-    
-    # Save as CSV
-    csv_path = f"{destination_path}/world_bank_indicators_{year}.csv"
-    df.to_csv(csv_path, index=False)
-    
-    print(f"Saved World Bank indicators to: {csv_path}")
-    return csv_path
+        # Save as CSV and/or Parquet, locally or straight to the object store
+        file_name, label = OUTPUT_FILES[source]
+        base_path = f"{source if object_store is not None else destination_path}/{file_name.format(year=year)}"
+        outputs[source] = save_if_changed(df, source, year, base_path, destination_path, skip_unchanged,
+                                          landing_format, object_store, upload_store)
+        if outputs[source] is not None:
+            print(f"Saved {label} to: {outputs[source]}")
 
-def run_climate_trace_pipeline(year, destination_path):
-    """Run the Climate Trace pipeline and save to local files."""
+    if errors:
+        raise errors[0]
+    return outputs
+
+def extract_years(source, years, destination_path, landing_format="csv", object_store=None, archive=None,
+                  replay=False, host_limits=None, hedge_budget=None, transport=None, country_registry=None):
+    """
+    Extract several years of one source and save each completed year.
+
+    What the ClimateTraceExtractor and WorldBankExtractor command lines run:
+    one run_sources over all years (replay_sources with replay), planner
+    state and checkpoints kept in destination_path, and every year saved as
+    run_pipelines saves it, years with unchanged content not being
+    rewritten. Returns the years that could not be completed; a rerun
+    resumes them from their checkpoints.
+    """
     os.makedirs(destination_path, exist_ok=True)
-    
-    # Fetch data directly
-    df = fetch_climate_trace_data(year)
-    
-    # Save as CSV
-    csv_path = f"{destination_path}/global_emissions_{year}.csv"
-    df.to_csv(csv_path, index=False)
-    
-    print(f"Saved Climate Trace emissions to: {csv_path}")
-    return csv_path
+    if replay:
+        if archive is None:
+            raise ValueError("Replay needs a response archive (EXTRACTOR_ARCHIVE_DIR)")
+        results = replay_sources([source], years, archive)
+    else:
+        results = run_sources([source], years, state_dirs={source.name: destination_path}, host_limits=host_limits,
+                              transport=transport, country_registry=country_registry, archive=archive,
+                              hedge_budget=hedge_budget)
+
+    file_name, label = OUTPUT_FILES[source.name]
+    incomplete = []
+    for year in years:
+        try:
+            df = extracted_frame(results, source.name, year)
+        except Exception as e:
+            print(f"Extracting {source.name} for {year} failed: {e}")
+            incomplete.append(year)
+            continue
+        if df.empty:
+            print(f"No {label} data available for {year}")
+            continue
+
+        base_path = f"{source.name if object_store is not None else destination_path}/{file_name.format(year=year)}"
+        written = save_if_changed(df, source.name, year, base_path, destination_path, True, landing_format,
+                                  object_store)
+        if written is not None:
+            print(f"Saved {label} for {year} to: {written}")
+    return incomplete
+
+def run_world_bank_pipeline(year, destination_path, multi_indicator=False, skip_unchanged=False, landing_format="csv",
+                            object_store=None, upload_store=None):
+    """
+    Run the World Bank pipeline and save to local files, or to object_store.
+
+    landing_format is "csv", "parquet" (typed, zstd-compressed) or "both".
+    With skip_unchanged, a year whose content matches the last extraction is
+    not rewritten and None is returned instead of the path.
+    """
+    return run_pipelines(year, {"world_bank": destination_path}, multi_indicator=multi_indicator,
+                         skip_unchanged=skip_unchanged, landing_format=landing_format,
+                         object_store=object_store, upload_store=upload_store)["world_bank"]
+
+def run_climate_trace_pipeline(year, destination_path, skip_unchanged=False, landing_format="csv", object_store=None,
+                               upload_store=None):
+    """
+    Run the Climate Trace pipeline and save to local files, or to object_store.
+
+    landing_format is "csv", "parquet" (typed, zstd-compressed) or "both".
+    With skip_unchanged, a year whose content matches the last extraction is
+    not rewritten and None is returned instead of the path.
+    """
+    return run_pipelines(year, {"climate_trace": destination_path}, skip_unchanged=skip_unchanged,
+                         landing_format=landing_format, object_store=object_store,
+                         upload_store=upload_store)["climate_trace"]
 
 if __name__ == "__main__":
     import sys
     
+    # --replay rebuilds the outputs from the response archive in EXTRACTOR_ARCHIVE_DIR
+    replay = "--replay" in sys.argv
+    if replay:
+        sys.argv.remove("--replay")
+    
     if len(sys.argv) < 3:
-        print("Usage: python dlt_extractor.py [world_bank|climate_trace] YEAR OUTPUT_DIR")
+        print("Usage: python data_extractor.py [--replay] [world_bank|climate_trace|all] YEAR OUTPUT_DIR "
+              "[csv|parquet|both] [STORE_URI]")
         sys.exit(1)
     
     source_type = sys.argv[1]
     year = int(sys.argv[2])
     output_dir = sys.argv[3] if len(sys.argv) > 3 else "data"
-    
-    if source_type == "world_bank":
-        run_world_bank_pipeline(year, output_dir)
-    elif source_type == "climate_trace":
-        run_climate_trace_pipeline(year, output_dir)
+    landing_format = sys.argv[4] if len(sys.argv) > 4 else "csv"
+    # e.g. gs://bucket to upload straight to GCS
+    object_store = sys.argv[5] if len(sys.argv) > 5 else None
+    
+    if source_type in OUTPUT_FILES:
+        run_pipelines(year, {source_type: output_dir}, landing_format=landing_format,
+                      object_store=object_store, replay=replay)
+    elif source_type == "all":
+        # Both sources in one run, each in its own subfolder
+        run_pipelines(year, {source: os.path.join(output_dir, source) for source in OUTPUT_FILES},
+                      landing_format=landing_format, object_store=object_store, replay=replay)
     else:
         print(f"Unknown source type: {source_type}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, List, Optional, Sequence, Set, Tuple
+
+import pyarrow as pa
+
+from arrow_stream import batches_to_table
+
+# Pieces older than this are refetched rather than resumed
+DEFAULT_MAX_AGE = 2 * 24 * 3600
+
+
+class ExtractionCheckpoint:
+    """
+    Completed pieces of an extraction run, persisted so a rerun resumes.
+
+    A piece is one unit of work that succeeded: a batch of countries for a
+    year window, or an indicator for a date. Pieces are grouped (one group
+    per window/date) and stored one file per piece under
+    <directory>/<group>/, written atomically as soon as the piece is done:
+    JSON for lists of records, Arrow IPC for record batches. A rerun asks
+    done() which keys a group already covers and fetches only the rest;
+    once every year is published the caller clears the checkpoint.
+    """
+
+    def __init__(self, directory: str, max_age: float = DEFAULT_MAX_AGE):
+        self.directory = directory
+        self.max_age = max_age
+
+    def _group_dir(self, group: str) -> str:
+        return os.path.join(self.directory, group)
+
+    @staticmethod
+    def _piece_name(keys: Sequence[str]) -> str:
+        return hashlib.sha1("\n".join(keys).encode("utf-8")).hexdigest()[:20]
+
+    def save(self, group: str, keys: Sequence[str], data: List[Any]):
+        """Persist one completed piece covering keys."""
+        group_dir = self._group_dir(group)
+        os.makedirs(group_dir, exist_ok=True)
+        name = os.path.join(group_dir, self._piece_name(keys))
+
+        if data and isinstance(data[0], pa.RecordBatch):
+            path = f"{name}.arrow"
+            table = batches_to_table(data)
+            table = table.replace_schema_metadata({"keys": json.dumps(list(keys))})
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with pa.OSFile(tmp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        else:
+            path = f"{name}.json"
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"keys": list(keys), "data": data}, f)
+
+        os.replace(tmp_path, path)
+
+    def _read(self, path: str) -> Optional[Tuple[List[str], List[Any]]]:
+        """Read a piece file, or None if it is stale or unreadable."""
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                return None
+            if path.endswith(".arrow"):
+                with pa.memory_map(path) as source:
+                    table = pa.ipc.open_file(source).read_all()
+                keys = json.loads(table.schema.metadata[b"keys"])
+                return keys, table.replace_schema_metadata(None).to_batches()
+            with open(path) as f:
+                piece = json.load(f)
+            return piece["keys"], piece["data"]
+        except (OSError, ValueError, KeyError, TypeError, pa.ArrowException) as e:
+            print(f"Ignoring unreadable checkpoint piece {path}: {e}")
+            return None
+
+    def _pieces(self, group: str) -> List[Tuple[List[str], List[Any]]]:
+        group_dir = self._group_dir(group)
+        if not os.path.isdir(group_dir):
+            return []
+
+        pieces = []
+        for filename in sorted(os.listdir(group_dir)):
+            if filename.endswith((".json", ".arrow")):
+                piece = self._read(os.path.join(group_dir, filename))
+                if piece is not None:
+                    pieces.append(piece)
+        return pieces
+
+    def piece(self, group: str, keys: Sequence[str]) -> Optional[List[Any]]:
+        """Return the data of the piece covering exactly keys, if it was completed."""
+        name = os.path.join(self._group_dir(group), self._piece_name(keys))
+        for path in (f"{name}.json", f"{name}.arrow"):
+            if os.path.exists(path):
+                piece = self._read(path)
+                if piece is not None:
+                    return piece[1]
+        return None
+
+    def done(self, group: str) -> Set[str]:
+        """Keys covered by the completed pieces of a group."""
+        return {key for keys, _ in self._pieces(group) for key in keys}
+
+    def pieces(self, group: str, order: Optional[Sequence[str]] = None) -> List[Tuple[List[str], List[Any]]]:
+        """
+        The (keys, data) of every completed piece in a group.
+
+        With order, pieces are sorted by the position of their first key in
+        it, so the result matches what a single uninterrupted run produces.
+        """
+        pieces = self._pieces(group)
+        if order is not None:
+            position = {key: i for i, key in enumerate(order)}
+            pieces.sort(key=lambda piece: min((position.get(key, len(position)) for key in piece[0]),
+                                              default=len(position)))
+        return pieces
+
+    def load(self, group: str, order: Optional[Sequence[str]] = None) -> List[Any]:
+        """Concatenate the data of every completed piece in a group (ordered as in pieces())."""
+        data = []
+        for _, piece_data in self.pieces(group, order):
+            data.extend(piece_data)
+        return data
+
+    def clear(self):
+        """Remove every piece once the run's output has been published."""
+        shutil.rmtree(self.directory, ignore_errors=True)
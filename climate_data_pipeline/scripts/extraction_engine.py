@@ -0,0 +1,563 @@
+import asyncio
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import requests
+
+from fetch_engine import HostScheduler
+from batch_planner import BatchPlanner, BatchResult, adaptive_batches
+from table_builder import KeyedColumnBuilder
+from arrow_stream import ArrowBatchBuilder, CountingChunks, JsonArrayStream, batches_to_table
+from http_transport import HttpTransport, get_transport
+from country_registry import CountryRegistry, get_country_registry
+from extraction_checkpoint import ExtractionCheckpoint
+from response_archive import ResponseArchive
+from hedging import Hedger
+
+
+class ExtractionContext:
+    """
+    Shared services of one extraction run: scheduler, transport, country
+    cache, state folders and, optionally, the raw response archive and a
+    Hedger for tail latency.
+    """
+
+    def __init__(self, scheduler: HostScheduler, transport: HttpTransport = None,
+                 country_registry: CountryRegistry = None, state_dirs: Optional[Dict[str, str]] = None,
+                 archive: Optional[ResponseArchive] = None, hedger: Optional[Hedger] = None):
+        self.scheduler = scheduler
+        self.transport = transport or get_transport()
+        self.country_registry = country_registry or get_country_registry()
+        self.state_dirs = state_dirs or {}
+        self.archive = archive
+        self.hedger = hedger
+
+    def fetch(self, url: str, func: Callable, *args, ok: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Run a blocking fetch of url, hedged when the run has a Hedger."""
+        if self.hedger is None:
+            return func(*args)
+        return self.hedger.call(url, func, *args, ok=ok)
+
+    def state_dir(self, source_name: str) -> str:
+        """Folder for a source's planner state and checkpoints (its output folder in the DAG)."""
+        return self.state_dirs.get(source_name) or os.path.join(tempfile.gettempdir(), "carbonlens_state", source_name)
+
+    def checkpoint(self, source_name: str, window: Tuple[int, int]) -> ExtractionCheckpoint:
+        """Checkpoint of a [since, to) year window of a source (<source>_<year> for a single year)."""
+        since, to = window
+        label = since if to - since == 1 else f"{since}_{to - 1}"
+        return ExtractionCheckpoint(os.path.join(self.state_dir(source_name), ".checkpoints", f"{source_name}_{label}"))
+
+
+class Source:
+    """
+    Declarative definition of an API source.
+
+    Subclasses implement one family of endpoints (how years become requests,
+    how responses are paged or batched); concrete sources are instances
+    configured with URLs, parameters and parse functions, see
+    extraction_sources.py. extract() returns one DataFrame per year, or the
+    exception that stopped that year, and sends every request through the
+    run's HostScheduler, so all sources of a run proceed together.
+
+    A year's DataFrame is always built by build() from the raw items of its
+    requests, so replay() can rebuild it from the response archive alone.
+    """
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = url
+
+    async def extract(self, years: List[int], context: ExtractionContext) -> Dict[int, Union[pd.DataFrame, Exception]]:
+        raise NotImplementedError
+
+    def build(self, year: int, batches: List[Tuple[List[str], List[Dict]]]) -> pd.DataFrame:
+        """DataFrame of a year from the (request keys, raw items) of its requests."""
+        raise NotImplementedError
+
+    def complete_year(self, year: int, batches: List[Tuple[List[str], List[Dict]]],
+                      context: ExtractionContext) -> pd.DataFrame:
+        """Archive a completed year's raw items (when archiving) and build its DataFrame."""
+        if context.archive is not None:
+            context.archive.write_year(self.name, year, batches)
+        return self.build(year, batches)
+
+    def replay(self, years: List[int], archive: ResponseArchive) -> Dict[int, Union[pd.DataFrame, Exception]]:
+        """Rebuild years from archived responses, without any request."""
+        frames = {}
+        for year in years:
+            try:
+                frames[year] = self.build(year, archive.read_year(self.name, year))
+            except (OSError, ValueError, KeyError) as e:
+                frames[year] = e
+        return frames
+
+
+class PagedSource(Source):
+    """
+    One paged listing per request key and date, e.g. a World Bank indicator.
+
+    <url>/<key>?date=<year>&page=N returns [metadata with 'pages', [items]].
+    The first page says how many pages there are and the rest are requested
+    concurrently. parse_item(item, key) returns (country, column, value) or
+    None; rows are keyed by country and carry the year as a constant column.
+    Each completed listing is checkpointed, so a failed year resumes, and
+    each listing is one batch of the response archive.
+
+    With bulk, every key is listed once for the whole year range
+    (date=FIRST:LAST) and the items are split per year by their 'date'. With
+    streaming, pages are parsed as they arrive into long-format Arrow record
+    batches (STREAM_SCHEMA) instead of lists of items.
+    """
+
+    # Columns of streamed listings, one row per (country, year, column) value
+    STREAM_SCHEMA = {'country': pa.string(), 'year': pa.int64(), 'column': pa.string(), 'value': pa.float64()}
+
+    def __init__(self, name: str, url: str, keys: List[str], params: Dict,
+                 parse_item: Callable[[Dict, str], Optional[Tuple[str, str, Any]]],
+                 column_order: Optional[List[str]] = None, page_size: int = 300,
+                 bulk: bool = False, streaming: bool = False):
+        super().__init__(name, url)
+        self.keys = keys
+        self.params = params
+        self.parse_item = parse_item
+        self.column_order = column_order
+        self.page_size = page_size
+        self.bulk = bulk
+        self.streaming = streaming
+
+    @staticmethod
+    def fetch_page(transport: HttpTransport, url: str, params: Dict) -> Tuple[List[Dict], int]:
+        """Fetch one page and return its items and the total page count."""
+        response = transport.get(url, params=params)
+        response.raise_for_status()
+        result = response.json()
+
+        if len(result) < 2 or not isinstance(result[1], list):
+            return [], 1
+        metadata = result[0] if isinstance(result[0], dict) else {}
+        return result[1], int(metadata.get('pages', 1) or 1)
+
+    def stream_page(self, transport: HttpTransport, url: str, params: Dict, key: str,
+                    year: Optional[int]) -> Tuple[List[pa.RecordBatch], int]:
+        """
+        Stream one page into record batches and return them with the total page count.
+
+        The metadata element comes before the records, so the page count is
+        known once the page is consumed. Items without a numeric 'date' get
+        year (the requested one), or are dropped for a multi-year date.
+        """
+        response = transport.get(url, params=params, stream=True)
+        response.raise_for_status()
+
+        stream = JsonArrayStream(CountingChunks(response), path=(1,))
+        builder = ArrowBatchBuilder(self.STREAM_SCHEMA)
+        for item in stream:
+            parsed = self.parse_item(item, key) if isinstance(item, dict) else None
+            date = str(item.get('date', '')) if parsed is not None else ''
+            if parsed is None or (not date.isdigit() and year is None):
+                continue
+            country, column, value = parsed
+            builder.append_values(country, int(date) if date.isdigit() else year, column, value)
+
+        metadata = stream.siblings.get(0)
+        pages = int(metadata.get('pages', 1) or 1) if isinstance(metadata, dict) else 1
+        return builder.finish(), pages
+
+    def windows(self, years: List[int]) -> List[Tuple[int, int]]:
+        """[since, to) year windows to request: the whole range in bulk mode, else one per year."""
+        if self.bulk and len(years) > 1:
+            return [(min(years), max(years) + 1)]
+        return [(year, year + 1) for year in years]
+
+    async def fetch_listing(self, key: str, window: Tuple[int, int], context: ExtractionContext,
+                            checkpoint: ExtractionCheckpoint) -> List[Any]:
+        """All items (or record batches) of one key for one date, from the checkpoint when an earlier attempt got them."""
+        group = "arrow_pages" if self.streaming else "pages"
+        items = checkpoint.piece(group, [key])
+        if items is not None:
+            print(f"Using checkpointed {self.name} {key} for {window_label(window)}")
+            return items
+
+        since, to = window
+        url = f"{self.url}/{key}"
+        params = {**self.params, "date": since if to - since == 1 else f"{since}:{to - 1}", "per_page": self.page_size}
+        if self.streaming:
+            fetch, args = self.stream_page, (key, since if to - since == 1 else None)
+        else:
+            fetch, args = self.fetch_page, ()
+        scheduler = context.scheduler
+
+        items, pages = await scheduler.call(url, context.fetch, url, fetch, context.transport, url,
+                                            {**params, "page": 1}, *args)
+        rest = await scheduler.gather(url, context.fetch,
+                                      [(url, fetch, context.transport, url, {**params, "page": page}, *args)
+                                       for page in range(2, pages + 1)])
+        for page_items, _ in rest:
+            items.extend(page_items)
+
+        checkpoint.save(group, [key], items)
+        return items
+
+    @staticmethod
+    def items_of_year(items: List[Any], year: int, window: Tuple[int, int]) -> List[Any]:
+        """The part of a listing that belongs to year (all of it for a single-year date)."""
+        if window[1] - window[0] == 1:
+            return items
+        if items and isinstance(items[0], pa.RecordBatch):
+            return [batch.filter(pc.equal(batch.column('year'), year)) for batch in items]
+        return [item for item in items if isinstance(item, dict) and str(item.get('date')) == str(year)]
+
+    async def extract_window(self, window: Tuple[int, int], context: ExtractionContext) -> Dict[int, Union[pd.DataFrame, Exception]]:
+        years = range(*window)
+        checkpoint = context.checkpoint(self.name, window)
+        print(f"Fetching {len(self.keys)} {self.name} listings for {window_label(window)}...")
+
+        # Let every listing finish (and be checkpointed) before reporting a failure
+        listings = await asyncio.gather(*(self.fetch_listing(key, window, context, checkpoint) for key in self.keys),
+                                        return_exceptions=True)
+        errors = [listing for listing in listings if isinstance(listing, Exception)]
+        if errors:
+            return {year: errors[0] for year in years}
+
+        frames = {}
+        for year in years:
+            try:
+                frames[year] = self.complete_year(
+                    year, [([key], self.items_of_year(items, year, window)) for key, items in zip(self.keys, listings)],
+                    context)
+            except OSError as e:
+                frames[year] = e
+        if not any(isinstance(frame, Exception) for frame in frames.values()):
+            checkpoint.clear()
+        return frames
+
+    def build(self, year: int, batches: List[Tuple[List[str], List[Any]]]) -> pd.DataFrame:
+        builder = KeyedColumnBuilder('country', constants={'year': year})
+        for keys, items in batches:
+            for item in items:
+                if isinstance(item, pa.RecordBatch):
+                    # Streamed listings are already parsed into columns
+                    columns = (item.column(name).to_pylist() for name in ('country', 'column', 'value'))
+                    for country, column, value in zip(*columns):
+                        builder.set(country, column, value)
+                    continue
+                parsed = self.parse_item(item, keys[0]) if isinstance(item, dict) else None
+                if parsed is not None:
+                    builder.set(*parsed)
+        return builder.to_frame(column_order=self.column_order)
+
+    async def extract(self, years: List[int], context: ExtractionContext) -> Dict[int, Union[pd.DataFrame, Exception]]:
+        results = await asyncio.gather(*(self.extract_window(window, context) for window in self.windows(years)))
+        frames = {}
+        for result in results:
+            frames.update(result)
+        return {year: frames[year] for year in years}
+
+
+def window_label(window: Tuple[int, int]) -> str:
+    """'2020' for a one-year [since, to) window, else e.g. '2015-2024'."""
+    since, to = window
+    return str(since) if to - since == 1 else f"{since}-{to - 1}"
+
+
+# Checkpoint group of the raw batch responses (parsed rows were kept under "batches" before)
+BATCH_GROUP = "responses"
+
+# Checkpoint group of streamed batch responses (Arrow record batches)
+ARROW_BATCH_GROUP = "arrow_responses"
+
+
+class CountryBatchSource(Source):
+    """
+    Countries sent in comma-joined batches, one request window per year.
+
+    <url>?<query> with query formatted from since, to and countries, e.g.
+    Climate Trace's since=2020&to=2021&countries=A,B,C. Country codes come
+    from the country registry under the source name; batch sizes come from a
+    BatchPlanner whose tuned size is kept in the source's state folder, and
+    the raw items of every completed batch are checkpointed (and archived
+    per batch once the year completes). parse_item(item, year) returns a
+    row dict or None. Each batch request, retries included, must answer
+    within deadline seconds (the transport's default when None), so one
+    stuck batch fails and is retried later instead of stalling the year.
+
+    With range_mode, each batch asks for a multi-year window: the widest
+    window whose response carries a 'year' per item (probed on a few
+    countries, halving from the whole range) is used and responses are split
+    per year locally. Years of a window that cannot be split fail, keeping
+    their checkpoint. With streaming, responses are parsed as they arrive
+    into Arrow record batches typed by stream_schema (other columns float64).
+    """
+
+    # Number of countries used when probing how wide a year window the API can split
+    RANGE_PROBE_SIZE = 5
+
+    def __init__(self, name: str, url: str, query: str, fetch_countries: Callable[[], List[Dict]],
+                 parse_item: Callable[[Dict, int], Optional[Dict]], planner_name: str,
+                 initial_batch_size: int = 10, deadline: Optional[float] = None, range_mode: bool = False,
+                 streaming: bool = False, stream_schema: Optional[Dict[str, pa.DataType]] = None):
+        super().__init__(name, url)
+        self.query = query
+        self.fetch_countries = fetch_countries
+        self.parse_item = parse_item
+        self.planner_name = planner_name
+        self.initial_batch_size = initial_batch_size
+        self.deadline = deadline
+        self.range_mode = range_mode
+        self.streaming = streaming
+        self.stream_schema = stream_schema or {}
+        self.batch_group = ARROW_BATCH_GROUP if streaming else BATCH_GROUP
+
+    def batch_url(self, country_codes: List[str], window: Tuple[int, int]) -> str:
+        # Country lists are formatted by hand, not as params, so commas are not URL-encoded
+        since, to = window
+        return f"{self.url}?" + self.query.format(since=since, to=to, countries=",".join(country_codes))
+
+    def stream_items(self, items: Iterable[Any], window: Tuple[int, int]) -> List[pa.RecordBatch]:
+        """Parse streamed items into record batches; multi-year windows take each item's own 'year'."""
+        since, to = window
+        builder = ArrowBatchBuilder(self.stream_schema)
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            row = self.parse_item(item, since if to - since == 1 else item.get('year'))
+            if row is not None:
+                builder.append(row)
+        return builder.finish()
+
+    def fetch_batch(self, transport: HttpTransport, country_codes: List[str], window: Tuple[int, int]) -> BatchResult:
+        """Fetch one batch's raw items (or record batches), reporting status, latency and size to the planner."""
+        print(f"Processing {self.name} batch of {len(country_codes)} countries for {window_label(window)}...")
+        started = time.time()
+        try:
+            response = transport.get(self.batch_url(country_codes, window), stream=self.streaming,
+                                     batch_size=len(country_codes), deadline=self.deadline)
+        except requests.RequestException as e:
+            print(f"Error fetching data: {e}")
+            return BatchResult(None, None, time.time() - started)
+        latency = time.time() - started
+
+        if response.status_code != 200:
+            print(f"Error fetching data: {response.status_code}")
+            print(f"Response: {response.text[:500]}")
+            return BatchResult(None, response.status_code, latency)
+
+        if self.streaming:
+            chunks = CountingChunks(response)
+            try:
+                batches = self.stream_items(JsonArrayStream(chunks), window)
+            except (requests.RequestException, ValueError) as e:
+                print(f"Error reading streamed data: {e}")
+                return BatchResult(None, None, time.time() - started)
+            return BatchResult(batches, response.status_code, time.time() - started, chunks.bytes)
+
+        items = [item for item in response.json() if isinstance(item, dict)]
+        return BatchResult(items, response.status_code, latency, len(response.content))
+
+    @staticmethod
+    def split_by_year(data: List[Any], window: Tuple[int, int]) -> Optional[Dict[int, List[Any]]]:
+        """
+        Split a window's items (or record batches) per year.
+
+        A single-year window is all that year. Otherwise every item must
+        carry its own 'year' inside the window, or None is returned.
+        """
+        since, to = window
+        if to - since == 1:
+            return {since: list(data)}
+
+        by_year = {year: [] for year in range(since, to)}
+        for piece in data:
+            if isinstance(piece, pa.RecordBatch):
+                if piece.num_rows == 0:
+                    continue
+                if 'year' not in piece.schema.names or piece.column('year').null_count:
+                    return None
+                years = piece.column('year')
+                if pc.min(years).as_py() < since or pc.max(years).as_py() >= to:
+                    return None
+                for year in by_year:
+                    by_year[year].append(piece.filter(pc.equal(years, year)))
+                continue
+            if not isinstance(piece, dict):
+                continue
+            try:
+                year = int(piece.get('year'))
+            except (TypeError, ValueError):
+                return None
+            if year not in by_year:
+                return None
+            by_year[year].append(piece)
+        return by_year
+
+    async def window_span(self, years: List[int], country_codes: List[str], context: ExtractionContext) -> int:
+        """
+        Widest window (in years) whose response can be split per year.
+
+        Probes a few countries with the whole range and halves the span until
+        the response splits; 1 means plain per-year requests.
+        """
+        span = len(years)
+        probe = country_codes[:self.RANGE_PROBE_SIZE]
+        while span > 1:
+            window = (years[0], years[0] + span)
+            result = await context.scheduler.call(self.url, self.fetch_batch, context.transport, probe, window)
+            if result.ok and result.data and self.split_by_year(result.data, window) is not None:
+                print(f"{self.name} returns per-year data for {span}-year windows")
+                return span
+            print(f"{self.name} {span}-year window is not splittable per year; trying a smaller one")
+            span //= 2
+        return 1
+
+    def build(self, year: int, batches: List[Tuple[List[str], List[Any]]]) -> pd.DataFrame:
+        rows = []
+        record_batches = []
+        for _, items in batches:
+            for item in items:
+                if isinstance(item, pa.RecordBatch):
+                    record_batches.append(item)
+                    continue
+                row = self.parse_item(item, year) if isinstance(item, dict) else None
+                if row is not None:
+                    rows.append(row)
+        if record_batches:
+            table = batches_to_table(record_batches)
+            return table.to_pandas() if table.num_rows else pd.DataFrame()
+        return pd.DataFrame(rows)
+
+    async def extract(self, years: List[int], context: ExtractionContext) -> Dict[int, Union[pd.DataFrame, Exception]]:
+        # Country list (cached across years and tasks)
+        countries = await context.scheduler.call(self.url, context.country_registry.get, self.name, self.fetch_countries)
+        country_codes = countries.alpha3_codes
+
+        # In range mode use the widest window the API can split (for a contiguous range); otherwise one year each
+        ordered = sorted(years)
+        span = 1
+        if self.range_mode and len(ordered) > 1 and ordered == list(range(ordered[0], ordered[-1] + 1)):
+            span = await self.window_span(ordered, country_codes, context)
+        windows = [(since, min(since + span, ordered[-1] + 1)) for since in ordered[::span]]
+
+        # Resume every window from the batches an earlier attempt completed
+        checkpoints = {window: context.checkpoint(self.name, window) for window in windows}
+        groups = []
+        for window in windows:
+            done = checkpoints[window].done(self.batch_group)
+            todo = [code for code in country_codes if code not in done]
+            if done:
+                print(f"Resuming {self.name} {window_label(window)}: {len(country_codes) - len(todo)} countries "
+                      f"already fetched, {len(todo)} to go")
+            if todo:
+                groups.append((window, todo))
+
+        def fetch_and_checkpoint(batch_countries: List[str], window: Tuple[int, int]) -> BatchResult:
+            result = context.fetch(self.batch_url(batch_countries, window), self.fetch_batch, context.transport,
+                                   batch_countries, window, ok=lambda result: result.ok)
+            if result.ok:
+                checkpoints[window].save(self.batch_group, batch_countries, result.data)
+            return result
+
+        if groups:
+            # Batch sizes are tuned from observed latency and errors; waves go through the host scheduler
+            planner = BatchPlanner(self.planner_name, initial_size=self.initial_batch_size,
+                                   state_path=os.path.join(context.state_dir(self.name), ".batch_planner.json"))
+            await adaptive_batches(
+                fetch_and_checkpoint,
+                groups,
+                planner,
+                context.scheduler.limit(self.url),
+                url_prefix_length=len(self.batch_url([], windows[-1])),
+                gather=lambda func, jobs, _: context.scheduler.gather(self.url, func, jobs)
+            )
+
+        frames = {}
+        for window in windows:
+            checkpoint = checkpoints[window]
+            window_years = range(*window)
+            missing = set(country_codes) - checkpoint.done(self.batch_group)
+            if missing:
+                error = RuntimeError(
+                    f"{self.name} {window_label(window)} is incomplete: {len(missing)} countries failed; completed "
+                    f"batches are kept in {checkpoint.directory} for the next attempt")
+                frames.update({year: error for year in window_years})
+                continue
+
+            pieces = [(keys, self.split_by_year(data, window))
+                      for keys, data in checkpoint.pieces(self.batch_group, order=country_codes)]
+            if any(split is None for _, split in pieces):
+                error = RuntimeError(
+                    f"{self.name} response for {window_label(window)} could not be split per year; completed "
+                    f"batches are kept in {checkpoint.directory}")
+                frames.update({year: error for year in window_years})
+                continue
+
+            for year in window_years:
+                try:
+                    frames[year] = self.complete_year(year, [(keys, split[year]) for keys, split in pieces], context)
+                except OSError as e:
+                    frames[year] = e
+            if not any(isinstance(frames[year], Exception) for year in window_years):
+                checkpoint.clear()
+        return {year: frames[year] for year in years}
+
+
+def run_sources(sources: List[Source], years: List[int], state_dirs: Optional[Dict[str, str]] = None,
+                host_limits: Optional[Dict[str, int]] = None, transport: HttpTransport = None,
+                country_registry: CountryRegistry = None, archive: Optional[ResponseArchive] = None,
+                hedge_budget: Optional[float] = None) -> Dict[str, Dict[int, Union[pd.DataFrame, Exception]]]:
+    """
+    Extract years from every source in one event loop.
+
+    All requests share a HostScheduler, so a run takes about as long as its
+    slowest source rather than the sum. Returns source name -> year -> the
+    year's DataFrame, or the exception that stopped it. With an archive, the
+    raw items of every completed year are archived for replay_sources().
+    With hedge_budget (e.g. 0.1), requests slower than their endpoint's p95
+    get a hedged duplicate, up to that fraction of extra requests.
+    """
+    years = [int(year) for year in years]
+
+    async def run_all():
+        scheduler = HostScheduler(host_limits)
+        hedger = Hedger(hedge_budget, scheduler=scheduler) if hedge_budget else None
+        context = ExtractionContext(scheduler, transport, country_registry, state_dirs, archive, hedger)
+
+        async def timed(source: Source):
+            started = time.time()
+            try:
+                return await source.extract(years, context)
+            finally:
+                print(f"{source.name} finished in {time.time() - started:.2f}s")
+
+        try:
+            results = await asyncio.gather(*(timed(source) for source in sources), return_exceptions=True)
+        finally:
+            scheduler.close()
+            if hedger is not None:
+                hedger.close()
+
+        output = {}
+        for source, result in zip(sources, results):
+            # A source-wide failure (e.g. no country list) fails each of its years
+            output[source.name] = {year: result for year in years} if isinstance(result, Exception) else result
+        return output
+
+    started = time.time()
+    output = asyncio.run(run_all())
+    print(f"Extracted {', '.join(source.name for source in sources)} for {years} in {time.time() - started:.2f}s")
+    return output
+
+
+def replay_sources(sources: List[Source], years: List[int],
+                   archive: ResponseArchive) -> Dict[str, Dict[int, Union[pd.DataFrame, Exception]]]:
+    """Rebuild years of every source from the response archive; same result shape as run_sources()."""
+    years = [int(year) for year in years]
+    started = time.time()
+    output = {source.name: source.replay(years, archive) for source in sources}
+    print(f"Replayed {', '.join(source.name for source in sources)} for {years} in {time.time() - started:.2f}s")
+    return output
@@ -0,0 +1,105 @@
+import fcntl
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import pandas as pd
+
+
+def content_hash(df: pd.DataFrame) -> str:
+    """SHA-256 of the CSV serialisation, so equal content gives an equal hash."""
+    return hashlib.sha256(df.to_csv(index=False).encode("utf-8")).hexdigest()
+
+
+class ExtractionManifest:
+    """
+    Per source/year record of what was last extracted.
+
+    Stored as JSON next to the extracted files:
+        {"world_bank": {"2020": {"hash": ..., "rows": ..., "fetched_at": ..., "changed_at": ...}}}
+
+    is_changed() tells the caller whether a freshly fetched year differs
+    from the last one written, so unchanged years can skip writing and
+    uploading; commit() records the year once its files are all written,
+    so a failed write is retried by the next run instead of being taken for
+    unchanged. Updates take an exclusive file lock because several Airflow
+    tasks (one per year) share the same manifest.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.changed = {}    # source -> [years] changed in this run
+        self.unchanged = {}  # source -> [years] unchanged in this run
+        self._digests = {}   # (source, year) -> content hash computed by is_changed, for commit
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable manifest {self.path}: {e}")
+            return {}
+
+    def _write(self, manifest: Dict):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def entry(self, source: str, year: int) -> Optional[Dict]:
+        """Return the recorded entry for source/year, if any."""
+        return self._read().get(source, {}).get(str(year))
+
+    def is_changed(self, source: str, year: int, df: pd.DataFrame) -> bool:
+        """Return True if a fetched year differs from the last committed one. Nothing is recorded."""
+        digest = content_hash(df)
+        self._digests[(source, str(year))] = digest
+        previous = self.entry(source, year)
+        changed = previous is None or previous.get("hash") != digest
+
+        (self.changed if changed else self.unchanged).setdefault(source, []).append(year)
+        return changed
+
+    def commit(self, source: str, year: int, df: pd.DataFrame):
+        """
+        Record a fetched year after its files were written (or found up to date).
+
+        fetched_at is always updated; hash, rows and changed_at only when
+        the content is different from the last recorded one.
+        """
+        digest = self._digests.pop((source, str(year)), None) or content_hash(df)
+        now = time.time()
+
+        with self._locked():
+            manifest = self._read()
+            previous = manifest.get(source, {}).get(str(year))
+
+            entry = dict(previous or {})
+            entry["fetched_at"] = now
+            if previous is None or previous.get("hash") != digest:
+                entry.update({"hash": digest, "rows": len(df), "changed_at": now})
+            manifest.setdefault(source, {})[str(year)] = entry
+            self._write(manifest)
+
+    def report(self) -> str:
+        """One line per source listing changed and unchanged years of this run."""
+        lines = []
+        for source in sorted(set(self.changed) | set(self.unchanged)):
+            lines.append(f"{source}: changed {sorted(self.changed.get(source, []))}, "
+                         f"unchanged {sorted(self.unchanged.get(source, []))}")
+        return "\n".join(lines)
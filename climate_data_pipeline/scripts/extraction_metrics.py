@@ -0,0 +1,250 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Histogram bucket upper bounds (Prometheus "le"); +Inf is implied
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+WAIT_BUCKETS = (0, 0.1, 0.5, 1, 5, 15, 60)
+BATCH_SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250)
+
+METRIC_PREFIX = "carbonlens_extractor"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with sum and count, as exposed to Prometheus."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, observations <= le) pairs, ending with +Inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip(list(self.buckets) + [float("inf")], self.counts):
+            total += count
+            pairs.append(("+Inf" if bound == float("inf") else f"{bound:g}", total))
+        return pairs
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None when empty or beyond the last bound)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, (_, total) in zip(self.buckets, self.cumulative()):
+            if total >= rank:
+                return bound
+        return None
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class EndpointMetrics:
+    """Aggregated requests to one endpoint (host + path, query excluded)."""
+
+    def __init__(self):
+        self.statuses: Dict[str, int] = {}
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+        self.hedge_losers_cancelled = 0
+        self.hedge_losers_abandoned = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.response_bytes = Histogram(BYTES_BUCKETS)
+        self.rate_limit_wait = Histogram(WAIT_BUCKETS)
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+
+    def to_dict(self) -> Dict:
+        return {
+            "requests": dict(self.statuses),
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedges_skipped": self.hedges_skipped,
+            "hedge_losers_cancelled": self.hedge_losers_cancelled,
+            "hedge_losers_abandoned": self.hedge_losers_abandoned,
+            "latency_seconds": self.latency.to_dict(),
+            "response_bytes": self.response_bytes.to_dict(),
+            "rate_limit_wait_seconds": self.rate_limit_wait.to_dict(),
+            "batch_size": self.batch_size.to_dict(),
+        }
+
+
+def endpoint_of(url: str) -> str:
+    """Metric label for a request URL: host and path, without the query."""
+    parts = urlsplit(url)
+    return f"{parts.hostname or ''}{parts.path}"
+
+
+class ExtractionMetrics:
+    """
+    Thread-safe per-endpoint request telemetry.
+
+    The HTTP transport records every request it sends: final status (or
+    "error" when the connection failed), latency of the last attempt,
+    response bytes, retries and the time spent waiting for the rate limiter.
+    Batch fetches also pass their batch size, and hedged requests (see
+    hedging.py) count whether the duplicate won. Metrics are aggregated into
+    histograms and written per run as JSON and as a Prometheus textfile
+    (for node_exporter's textfile collector).
+    """
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointMetrics] = {}
+        self.started = time.time()
+        self.lock = threading.Lock()
+
+    def record(self, url: str, status: Optional[int], latency: float, response_bytes: Optional[int] = None,
+               retries: int = 0, rate_limit_wait: float = 0.0, batch_size: Optional[int] = None):
+        endpoint = endpoint_of(url)
+        with self.lock:
+            metrics = self.endpoints.setdefault(endpoint, EndpointMetrics())
+            status_label = str(status) if status is not None else "error"
+            metrics.statuses[status_label] = metrics.statuses.get(status_label, 0) + 1
+            metrics.retries += retries
+            metrics.latency.observe(latency)
+            metrics.rate_limit_wait.observe(rate_limit_wait)
+            if response_bytes is not None:
+                metrics.response_bytes.observe(response_bytes)
+            if batch_size is not None:
+                metrics.batch_size.observe(batch_size)
+
+    def record_hedge(self, url: str, won: bool, cancelled: bool = False, abandoned: bool = False):
+        """
+        Count a hedged duplicate request, whether it answered first and what
+        happened to the losing attempt: cancelled before it was sent, or
+        abandoned while in flight (it still runs to completion).
+        """
+        with self.lock:
+            metrics = self.endpoints.setdefault(endpoint_of(url), EndpointMetrics())
+            metrics.hedges += 1
+            metrics.hedge_wins += int(won)
+            metrics.hedge_losers_cancelled += int(cancelled)
+            metrics.hedge_losers_abandoned += int(abandoned)
+
+    def record_hedge_skipped(self, url: str):
+        """Count a hedge that was due but not sent because the host had no free slot."""
+        with self.lock:
+            self.endpoints.setdefault(endpoint_of(url), EndpointMetrics()).hedges_skipped += 1
+
+    def reset(self):
+        """Forget everything recorded so far, at the start of a run."""
+        with self.lock:
+            self.endpoints = {}
+            self.started = time.time()
+
+    def to_dict(self, run: str = "") -> Dict:
+        with self.lock:
+            return {
+                "run": run,
+                "started": self.started,
+                "finished": time.time(),
+                "endpoints": {endpoint: metrics.to_dict() for endpoint, metrics in sorted(self.endpoints.items())},
+            }
+
+    def to_prometheus(self, run: str = "") -> str:
+        """Prometheus text exposition of the metrics, labelled by run and endpoint."""
+        histograms = [
+            ("request_latency_seconds", "latency", "Latency of the final attempt of each request"),
+            ("response_bytes", "response_bytes", "Response body size"),
+            ("rate_limit_wait_seconds", "rate_limit_wait", "Time each request waited for the rate limiter"),
+            ("batch_size", "batch_size", "Countries or items requested per batch"),
+        ]
+        lines = [
+            f"# HELP {METRIC_PREFIX}_requests_total Requests by final status",
+            f"# TYPE {METRIC_PREFIX}_requests_total counter",
+        ]
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            for endpoint, metrics in endpoints:
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append(f'{METRIC_PREFIX}_requests_total{{run="{run}",endpoint="{endpoint}",'
+                                 f'status="{status}"}} {count}')
+
+            counters = [
+                ("retries_total", "retries", "Retried attempts"),
+                ("hedges_total", "hedges", "Hedged duplicate requests"),
+                ("hedge_wins_total", "hedge_wins", "Hedged duplicates that answered first"),
+                ("hedges_skipped_total", "hedges_skipped", "Hedges not sent because the host had no free slot"),
+                ("hedge_losers_cancelled_total", "hedge_losers_cancelled", "Losing attempts cancelled before they were sent"),
+                ("hedge_losers_abandoned_total", "hedge_losers_abandoned", "Losing attempts left to finish unused"),
+            ]
+            for name, attr, help_text in counters:
+                lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+                lines.append(f"# TYPE {METRIC_PREFIX}_{name} counter")
+                for endpoint, metrics in endpoints:
+                    lines.append(f'{METRIC_PREFIX}_{name}{{run="{run}",endpoint="{endpoint}"}} {getattr(metrics, attr)}')
+
+            for name, attr, help_text in histograms:
+                metric = f"{METRIC_PREFIX}_{name}"
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for endpoint, metrics in endpoints:
+                    histogram = getattr(metrics, attr)
+                    labels = f'run="{run}",endpoint="{endpoint}"'
+                    for le, count in histogram.cumulative():
+                        lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {count}')
+                    lines.append(f"{metric}_sum{{{labels}}} {histogram.sum:g}")
+                    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: str, run: str) -> List[str]:
+        """Write <run>.json and <run>.prom to directory and return their paths."""
+        os.makedirs(directory, exist_ok=True)
+        outputs = [
+            (os.path.join(directory, f"{run}.json"), json.dumps(self.to_dict(run), indent=2)),
+            (os.path.join(directory, f"{run}.prom"), self.to_prometheus(run)),
+        ]
+        for path, content in outputs:
+            # Atomic replace, so the textfile collector never reads half a file
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return [path for path, _ in outputs]
+
+
+_metrics = ExtractionMetrics()
+
+
+def get_metrics() -> ExtractionMetrics:
+    """Process-wide metrics, recorded into by the shared HTTP transport."""
+    return _metrics
+
+
+def write_run_metrics(run: str) -> List[str]:
+    """
+    Write this process's metrics for run to EXTRACTOR_METRICS_DIR.
+
+    Nothing is written (and [] returned) when the variable is unset.
+    """
+    directory = os.environ.get("EXTRACTOR_METRICS_DIR")
+    if not directory:
+        return []
+    paths = get_metrics().write(directory, run)
+    print(f"Wrote extraction metrics to {', '.join(paths)}")
+    return paths
@@ -0,0 +1,116 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from http_transport import get_transport
+from extraction_engine import CountryBatchSource, PagedSource, Source
+from schemas import KEY_COLUMNS, WORLD_BANK_INDICATORS
+
+# API base URLs; override them to run against a local stand-in (see benchmarks/mock_api.py)
+WORLD_BANK_API = os.environ.get("WORLD_BANK_API_URL", "https://api.worldbank.org/v2")
+CLIMATE_TRACE_API = os.environ.get("CLIMATE_TRACE_API_URL", "https://api.climatetrace.org/v6")
+
+# World Bank indicators to extract are declared in schemas.WORLD_BANK_INDICATORS
+
+# Seconds a Climate Trace batch request may take, retries included, before it is given up
+CLIMATE_TRACE_BATCH_DEADLINE = 120
+
+# Multi-indicator requests need a source id (2 = World Development Indicators)
+# and accept at most 60 semicolon-joined indicators
+WORLD_BANK_SOURCE_ID = 2
+WORLD_BANK_MAX_INDICATORS_PER_REQUEST = 60
+
+
+def fetch_world_bank_countries() -> List[Dict]:
+    """Fetch the World Bank country list (used through the country registry)."""
+    print("Fetching list of countries from World Bank API")
+    url = f"{WORLD_BANK_API}/country"
+    params = {"format": "json", "per_page": 300}
+
+    countries, pages = PagedSource.fetch_page(get_transport(), url, {**params, "page": 1})
+    for page in range(2, pages + 1):
+        countries.extend(PagedSource.fetch_page(get_transport(), url, {**params, "page": page})[0])
+    return countries
+
+
+def fetch_climate_trace_countries() -> List[Dict]:
+    """Fetch the Climate Trace country list (used through the country registry)."""
+    print("Fetching list of countries from Climate Trace API")
+    response = get_transport().get(f"{CLIMATE_TRACE_API}/definitions/countries/")
+    response.raise_for_status()
+    return response.json()
+
+
+def parse_world_bank_item(item: Dict, key: str) -> Optional[Tuple[str, str, Any]]:
+    """(country, indicator, value) of a World Bank item; multi-indicator keys read the indicator from the item."""
+    country_code = item.get('countryiso3code')
+    value = item.get('value')
+    code = (item.get('indicator') or {}).get('id') if ';' in key else key
+
+    if not country_code or value is None or not code:
+        return None
+    return country_code, code, value
+
+
+def parse_climate_trace_item(item: Dict, year: int) -> Optional[Dict]:
+    """Flatten a Climate Trace country item into a country/year row of emission values."""
+    country_code = item.get('country')
+    emissions = item.get('emissions', {})
+
+    if not country_code or not emissions:
+        return None
+    return {'country': country_code, 'year': year, **emissions}
+
+
+def world_bank_source(multi_indicator: bool = False, bulk: bool = False, streaming: bool = False) -> PagedSource:
+    """
+    World Bank indicators for all countries.
+
+    By default one listing per indicator and year; with multi_indicator,
+    indicators are joined with ';' so one listing covers up to 60 of them.
+    bulk lists every indicator once for the whole year range
+    (date=START:END) and streaming parses pages as they arrive.
+    """
+    indicators = list(WORLD_BANK_INDICATORS)
+    # Multi-indicator and date-range listings return one row per indicator (and year), so use larger pages
+    page_size = 1000 if multi_indicator or bulk else 300
+    if multi_indicator:
+        keys = [";".join(indicators[i:i + WORLD_BANK_MAX_INDICATORS_PER_REQUEST])
+                for i in range(0, len(indicators), WORLD_BANK_MAX_INDICATORS_PER_REQUEST)]
+        return PagedSource("world_bank", f"{WORLD_BANK_API}/countries/all/indicators", keys,
+                           {"source": WORLD_BANK_SOURCE_ID, "format": "json"}, parse_world_bank_item,
+                           column_order=indicators, page_size=page_size, bulk=bulk, streaming=streaming)
+
+    return PagedSource("world_bank", f"{WORLD_BANK_API}/countries/all/indicators", indicators,
+                       {"format": "json"}, parse_world_bank_item, column_order=indicators,
+                       page_size=page_size, bulk=bulk, streaming=streaming)
+
+
+def climate_trace_source(range_mode: bool = False, streaming: bool = False,
+                         deadline: float = CLIMATE_TRACE_BATCH_DEADLINE) -> CountryBatchSource:
+    """
+    Climate Trace country-level emissions, countries batched per year.
+
+    range_mode requests multi-year windows per batch and splits them per year
+    locally; streaming parses responses as they arrive.
+    """
+    return CountryBatchSource("climate_trace", f"{CLIMATE_TRACE_API}/country/emissions",
+                              "since={since}&to={to}&countries={countries}",
+                              fetch_climate_trace_countries, parse_climate_trace_item,
+                              planner_name="climate_trace_country_emissions",
+                              deadline=deadline, range_mode=range_mode, streaming=streaming,
+                              stream_schema=dict(KEY_COLUMNS))
+
+
+# Source name -> factory, for command lines and DAGs that pick sources by name
+SOURCES = {
+    "world_bank": world_bank_source,
+    "climate_trace": climate_trace_source,
+}
+
+
+def get_sources(names: List[str], multi_indicator: bool = False) -> List[Source]:
+    """Build the named sources; unknown names raise ValueError."""
+    unknown = [name for name in names if name not in SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown sources {unknown}; expected some of {list(SOURCES)}")
+    return [world_bank_source(multi_indicator) if name == "world_bank" else SOURCES[name]() for name in names]
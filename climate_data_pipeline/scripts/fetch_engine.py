@@ -0,0 +1,110 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+# Default number of requests allowed to be in flight at the same time
+DEFAULT_MAX_IN_FLIGHT = 8
+
+
+async def _run_job(semaphore: asyncio.Semaphore, func: Callable, args: Tuple) -> Any:
+    """Run a single blocking job in a worker thread once a slot is free."""
+    async with semaphore:
+        return await asyncio.to_thread(func, *args)
+
+
+async def gather_limited(func: Callable, jobs: Sequence[Tuple], max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> List[Any]:
+    """
+    Run func(*args) for every args tuple in jobs concurrently.
+
+    At most max_in_flight calls run at the same time. Results are returned
+    in the same order as jobs, regardless of completion order.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_in_flight))
+    tasks = [_run_job(semaphore, func, args) for args in jobs]
+    return await asyncio.gather(*tasks)
+
+
+def run_concurrently(func: Callable, jobs: Sequence[Tuple], max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> List[Any]:
+    """
+    Synchronous entry point for gather_limited.
+
+    Extractors and Airflow tasks are plain functions, so this owns the event
+    loop for the duration of the call.
+    """
+    if not jobs:
+        return []
+    return asyncio.run(gather_limited(func, jobs, max_in_flight))
+
+
+# Requests allowed in flight per API host when several sources run together
+DEFAULT_HOST_CONCURRENCY = {
+    "api.worldbank.org": 4,
+    "api.climatetrace.org": 8,
+}
+
+
+class HostScheduler:
+    """
+    Runs blocking request functions in worker threads with a per-host limit.
+
+    Every source of an extraction run submits its requests here, so requests
+    to different hosts proceed side by side while each host sees at most its
+    own number in flight. Must be used from inside a single event loop; the
+    semaphores are created lazily in that loop. Worker threads can take an
+    extra slot without waiting with try_acquire() (hedged requests do).
+    """
+
+    def __init__(self, host_limits: Optional[Dict[str, int]] = None,
+                 default_limit: int = DEFAULT_MAX_IN_FLIGHT):
+        self.host_limits = dict(DEFAULT_HOST_CONCURRENCY)
+        self.host_limits.update(host_limits or {})
+        self.default_limit = default_limit
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        # Enough threads for every host to use its full limit at once
+        self.executor = ThreadPoolExecutor(
+            max_workers=sum(self.host_limits.values()) + default_limit,
+            thread_name_prefix="extract",
+        )
+
+    def limit(self, url: str) -> int:
+        """Concurrency limit for the host of url."""
+        return max(1, self.host_limits.get(urlsplit(url).hostname or "", self.default_limit))
+
+    def _semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ""
+        self.loop = asyncio.get_running_loop()
+        if host not in self.semaphores:
+            self.semaphores[host] = asyncio.Semaphore(self.limit(url))
+        return self.semaphores[host]
+
+    async def call(self, url: str, func: Callable, *args) -> Any:
+        """Run func(*args) in a worker thread once the host of url has a free slot."""
+        async with self._semaphore(url):
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def try_acquire(self, url: str) -> bool:
+        """
+        Take a slot of url's host from a worker thread if one is free, without
+        waiting. A taken slot must be given back with release().
+        """
+        async def acquire() -> bool:
+            semaphore = self._semaphore(url)
+            if semaphore.locked():
+                return False
+            await semaphore.acquire()
+            return True
+
+        return asyncio.run_coroutine_threadsafe(acquire(), self.loop).result()
+
+    def release(self, url: str):
+        """Give back a slot taken with try_acquire(); safe from any thread."""
+        self.loop.call_soon_threadsafe(lambda: self._semaphore(url).release())
+
+    async def gather(self, url: str, func: Callable, jobs: Sequence[Tuple]) -> List[Any]:
+        """Run func(*args) for every args tuple in jobs against url's host; results in job order."""
+        return await asyncio.gather(*(self.call(url, func, *args) for args in jobs))
+
+    def close(self):
+        self.executor.shutdown(wait=False)
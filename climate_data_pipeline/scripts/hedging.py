@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+from extraction_metrics import endpoint_of, get_metrics
+from fetch_engine import HostScheduler
+
+# Latencies kept per endpoint for the hedge delay, and how many are needed before hedging starts
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 20
+
+
+class Hedger:
+    """
+    Hedged requests for tail latency.
+
+    call() runs a fetch and, if it has not returned after the endpoint's
+    recent p95 latency, starts an identical duplicate and returns whichever
+    finishes first with a usable result. The losing attempt is cancelled if
+    it has not been sent yet, otherwise it is abandoned (left to finish) and
+    counted in the metrics. Hedges are capped at budget times the number of
+    calls, so at most e.g. 10% extra load reaches the provider, and no
+    hedging happens until MIN_SAMPLES latencies of the endpoint are known.
+    Fetches must be safe to run twice (plain GETs).
+
+    call() runs inside a host slot of the scheduler; with a scheduler, the
+    hedge takes a second slot of the same host, held until both attempts are
+    done, and is skipped when the host has none free, so hedging never
+    exceeds the host's concurrency limit.
+    """
+
+    def __init__(self, budget: float = 0.1, quantile: float = 0.95, max_workers: int = 32,
+                 scheduler: Optional[HostScheduler] = None):
+        self.budget = budget
+        self.scheduler = scheduler
+        self.quantile = quantile
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.calls = 0
+        self.hedges = 0
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def delay(self, endpoint: str) -> Optional[float]:
+        """Seconds to wait before hedging a request to endpoint, or None while there is too little history."""
+        with self.lock:
+            samples = sorted(self.latencies.get(endpoint, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(self.quantile * len(samples)))]
+
+    def observe(self, endpoint: str, latency: float):
+        with self.lock:
+            self.latencies.setdefault(endpoint, deque(maxlen=LATENCY_WINDOW)).append(latency)
+
+    def _take_hedge(self, url: str) -> bool:
+        """Spend one hedge from the budget and take a host slot for it, if both are available."""
+        with self.lock:
+            if self.hedges + 1 > self.budget * self.calls:
+                return False
+            self.hedges += 1
+        if self.scheduler is not None and not self.scheduler.try_acquire(url):
+            with self.lock:
+                self.hedges -= 1
+            get_metrics().record_hedge_skipped(url)
+            return False
+        return True
+
+    def _release_when_done(self, url: str, attempts):
+        """Give the hedge's host slot back once every attempt has finished or was cancelled."""
+        if self.scheduler is None:
+            return
+        remaining = [len(attempts)]
+
+        def finished(_):
+            with self.lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                self.scheduler.release(url)
+
+        for attempt in attempts:
+            attempt.add_done_callback(finished)
+
+    def call(self, url: str, func: Callable, *args, ok: Callable[[Any], bool] = None) -> Any:
+        """
+        Return func(*args), hedged after the p95 latency of url's endpoint.
+
+        ok(result) tells whether a result is usable; an unusable (or failed)
+        first result waits for the other attempt instead of being returned.
+        """
+        endpoint = endpoint_of(url)
+        with self.lock:
+            self.calls += 1
+
+        started = time.monotonic()
+        primary = self.executor.submit(func, *args)
+        delay = self.delay(endpoint)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_hedge(url):
+            result = primary.result()
+            self.observe(endpoint, time.monotonic() - started)
+            return result
+
+        print(f"Request to {endpoint} slower than p95 ({delay:.2f}s); sending a hedged duplicate")
+        hedge = self.executor.submit(func, *args)
+        self._release_when_done(url, [primary, hedge])
+        pending = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            usable = [future for future in done
+                      if future.exception() is None and (ok is None or ok(future.result()))]
+            if usable:
+                loser = primary if usable[0] is hedge else hedge
+                cancelled = loser.cancel()
+                get_metrics().record_hedge(url, won=usable[0] is hedge, cancelled=cancelled,
+                                           abandoned=not cancelled and not loser.done())
+                # Latency until the first usable answer, which is what the caller waited
+                self.observe(endpoint, time.monotonic() - started)
+                return usable[0].result()
+            if not pending:
+                # Both attempts failed: report the last one (re-raising its exception)
+                get_metrics().record_hedge(url, won=False)
+                return done.pop().result()
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+def hedge_budget_from_env() -> Optional[float]:
+    """
+    Hedge budget from EXTRACTOR_HEDGE_BUDGET (extra requests as a fraction
+    of all requests, e.g. 0.1), or None when hedging is off (unset or 0).
+    """
+    budget = float(os.environ.get("EXTRACTOR_HEDGE_BUDGET", 0) or 0)
+    return budget if budget > 0 else None
@@ -0,0 +1,200 @@
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import RateLimiter
+from response_cache import ResponseCache, OfflineCacheMiss, cache_from_env, normalize_url
+from extraction_metrics import ExtractionMetrics, get_metrics
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5, 60)
+
+# Overall time budget of one request, retries and backoff included
+DEFAULT_DEADLINE = 300
+
+# Responses worth retrying: throttling and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class DeadlineExceeded(requests.Timeout):
+    """The request's deadline passed before it could be (re)sent."""
+
+
+def cap_timeout(timeout: Union[float, Tuple[float, float]], remaining: float) -> Union[float, Tuple[float, float]]:
+    """Shorten a requests timeout (single or (connect, read)) to the time remaining."""
+    if isinstance(timeout, tuple):
+        return tuple(min(part, remaining) for part in timeout)
+    return min(timeout, remaining)
+
+
+class HttpTransport:
+    """
+    Shared HTTP client for the extractors.
+
+    Wraps a requests.Session with a keep-alive connection pool, so batches to
+    the same host reuse TCP/TLS connections, asks for gzip responses, applies
+    default timeouts and retries transient failures with exponential backoff
+    and full jitter, all within a per-request deadline. Every attempt first
+    takes a token from the per-host rate limiter, and a 429 pauses the whole
+    host rather than just this request. With a ResponseCache, fresh
+    responses are served locally and stale ones are revalidated with
+    conditional requests. Every request sent over the network is recorded
+    in the extraction metrics.
+    """
+
+    def __init__(self, pool_size: int = 16, timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 max_retries: int = 4, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 rate_limiter: RateLimiter = None, cache: ResponseCache = None,
+                 metrics: ExtractionMetrics = None, deadline: float = DEFAULT_DEADLINE):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.cache = cache
+        self.metrics = metrics or get_metrics()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "User-Agent": "carbonlens-extractor",
+        })
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Seconds to wait before retry number attempt (0-based)."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+        # A server-provided Retry-After (in seconds) is a lower bound
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+
+        return delay
+
+    def get(self, url: str, params: Optional[Dict] = None,
+            timeout: Union[float, Tuple[float, float], None] = None, stream: bool = False,
+            batch_size: Optional[int] = None, deadline: Optional[float] = None) -> requests.Response:
+        """
+        GET url, going through the response cache when one is configured.
+
+        Returns the response (the caller decides what a bad status means) or
+        raises the last connection error once retries are exhausted or the
+        deadline (seconds, default self.deadline) has passed. With
+        stream=True the body is left unread so it can be consumed with
+        iter_content (each read is then bounded by the read timeout, not the
+        deadline); cached responses support iter_content as well. batch_size
+        (countries or items requested) is only used for metrics.
+        """
+        if self.cache is None:
+            return self._get_with_retries(url, params, timeout, stream=stream, batch_size=batch_size,
+                                          deadline=deadline)
+
+        key = normalize_url(url, params)
+        entry = self.cache.lookup(key)
+
+        if entry is not None and self.cache.is_fresh(entry):
+            return entry.to_response()
+        if self.cache.offline:
+            raise OfflineCacheMiss(f"Not in the response cache (offline mode): {key}")
+
+        # Revalidate a stale entry instead of downloading it again
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+        # Storing in the cache reads the body, so cached requests are never truly streamed
+        response = self._get_with_retries(url, params, timeout, headers, batch_size=batch_size, deadline=deadline)
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.refresh(key)
+            return entry.to_response()
+        if response.status_code == 200:
+            self.cache.store(key, response)
+        return response
+
+    def _get_with_retries(self, url: str, params: Optional[Dict] = None,
+                          timeout: Union[float, Tuple[float, float], None] = None,
+                          headers: Optional[Dict] = None, stream: bool = False,
+                          batch_size: Optional[int] = None, deadline: Optional[float] = None) -> requests.Response:
+        """
+        GET url, retrying connection errors, timeouts and RETRY_STATUSES.
+
+        Attempts, rate-limit waits and backoff all fit in deadline seconds:
+        each attempt's timeouts are cut to the time left, and a retry that
+        could not start in time is not made (the last response is returned,
+        or the last error raised).
+        """
+        deadline = deadline or self.deadline
+        expires = time.monotonic() + deadline
+        waited = 0.0
+        for attempt in range(self.max_retries + 1):
+            waited += self.rate_limiter.acquire(url)
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"Deadline of {deadline:g}s passed before {url} answered")
+
+            started = time.monotonic()
+            try:
+                response = self.session.get(url, params=params, headers=headers,
+                                            timeout=cap_timeout(timeout or self.timeout, remaining), stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                delay = self.backoff_delay(attempt)
+                if attempt == self.max_retries or time.monotonic() + delay >= expires:
+                    self.metrics.record(url, None, time.monotonic() - started, retries=attempt,
+                                        rate_limit_wait=waited, batch_size=batch_size)
+                    raise
+                print(f"Request failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                delay = self.backoff_delay(attempt, response.headers.get("Retry-After"))
+                if time.monotonic() + delay < expires:
+                    # Release the connection of a streamed response we are not going to read
+                    response.close()
+                    if response.status_code == 429 or response.headers.get("Retry-After"):
+                        # The provider asked us to slow down: hold back every request to this host
+                        self.rate_limiter.pause(url, delay)
+                    else:
+                        print(f"Got status {response.status_code}; retrying in {delay:.1f}s")
+                        time.sleep(delay)
+                    continue
+
+            # A streamed body is not read yet, so its size is the (possibly compressed) Content-Length
+            if stream:
+                size = response.headers.get("Content-Length")
+                size = int(size) if size and size.isdigit() else None
+            else:
+                size = len(response.content)
+            self.metrics.record(url, response.status_code, time.monotonic() - started, size,
+                                retries=attempt, rate_limit_wait=waited, batch_size=batch_size)
+            return response
+
+    def close(self):
+        self.session.close()
+
+
+_shared_transport = None
+_shared_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """
+    Return the process-wide transport, creating it on first use.
+
+    The response cache is opt-in through EXTRACTOR_CACHE_PATH (see cache_from_env).
+    """
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = HttpTransport(cache=cache_from_env())
+        return _shared_transport
@@ -0,0 +1,110 @@
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from schemas import KEY_COLUMNS, SourceSchema, read_csv
+
+# Supported landing outputs for extracted years
+LANDING_FORMATS = ("csv", "parquet", "both")
+
+# Key columns (schemas.KEY_COLUMNS) are explicitly typed; every other column is a numeric indicator/emission
+VALUE_TYPE = pa.float64()
+
+PARQUET_COMPRESSION = "zstd"
+
+CONTENT_TYPES = {".csv": "text/csv", ".parquet": "application/vnd.apache.parquet"}
+
+
+def landing_extensions(landing_format: str) -> List[str]:
+    """File extensions written for a landing format, e.g. ['.csv', '.parquet'] for 'both'."""
+    if landing_format not in LANDING_FORMATS:
+        raise ValueError(f"Unknown landing format {landing_format!r}; expected one of {LANDING_FORMATS}")
+    if landing_format == "both":
+        return [".csv", ".parquet"]
+    return [f".{landing_format}"]
+
+
+def landing_paths(base_path: str, landing_format: str) -> List[str]:
+    """Paths written for base_path (without extension) in a landing format."""
+    return [f"{base_path}{ext}" for ext in landing_extensions(landing_format)]
+
+
+def landing_schema(columns: List[str]) -> pa.Schema:
+    """Schema for a landed year: country string, year int64, everything else float64."""
+    return pa.schema([(col, KEY_COLUMNS.get(col, VALUE_TYPE)) for col in columns])
+
+
+def to_landing_table(df: pd.DataFrame, year: Optional[int] = None) -> pa.Table:
+    """
+    Convert an extracted year to a typed Arrow table.
+
+    A year column is added after 'country' when the frame has none, so every
+    Parquet file carries its own year.
+    """
+    if 'year' not in df.columns and year is not None:
+        df = df.copy()
+        df.insert(1 if 'country' in df.columns else 0, 'year', int(year))
+
+    schema = landing_schema(list(df.columns))
+    # Values that are not numbers become nulls, as pd.to_numeric(errors='coerce') did downstream
+    for col in df.columns:
+        if col not in KEY_COLUMNS:
+            df = df.assign(**{col: pd.to_numeric(df[col], errors='coerce')})
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def write_landing(df: pd.DataFrame, base_path: str, landing_format: str = "csv",
+                  year: Optional[int] = None) -> List[str]:
+    """Write df to base_path + .csv and/or .parquet and return the written paths."""
+    paths = landing_paths(base_path, landing_format)
+
+    for path in paths:
+        if path.endswith(".parquet"):
+            pq.write_table(to_landing_table(df, year), path, compression=PARQUET_COMPRESSION)
+        else:
+            df.to_csv(path, index=False)
+
+    return paths
+
+
+def landing_bytes(df: pd.DataFrame, ext: str, year: Optional[int] = None) -> bytes:
+    """Serialise df in memory as a .csv or .parquet file body."""
+    if ext == ".parquet":
+        sink = pa.BufferOutputStream()
+        pq.write_table(to_landing_table(df, year), sink, compression=PARQUET_COMPRESSION)
+        return sink.getvalue().to_pybytes()
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def write_landing_to_store(df: pd.DataFrame, store, base_key: str, landing_format: str = "csv",
+                           year: Optional[int] = None) -> List[str]:
+    """
+    Write df straight to an object store (see object_store.py) under
+    base_key + .csv and/or .parquet, without touching local disk. Returns
+    the written objects' URIs.
+    """
+    uris = []
+    for ext in landing_extensions(landing_format):
+        uris.append(store.put(f"{base_key}{ext}", landing_bytes(df, ext, year), CONTENT_TYPES[ext]))
+    return uris
+
+
+def read_landing(path: str, buffer=None, schema: Optional[SourceSchema] = None) -> pd.DataFrame:
+    """
+    Read a landed file, Parquet or CSV, based on its extension. With buffer
+    (a file-like object holding the file's body) path only names the format.
+
+    With a schema (see schemas.py) columns get their processed names, and CSV
+    is parsed with the declared types instead of being inferred.
+    """
+    source = buffer if buffer is not None else path
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(source)
+        if schema is not None:
+            df.columns = [schema.clean_name(col) for col in df.columns]
+        return df
+    if schema is not None:
+        return read_csv(source, schema)
+    return pd.read_csv(source)
@@ -0,0 +1,318 @@
+import io
+import os
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+# Resumable uploads send the body in chunks of this size (must be a multiple of 256 KB);
+# smaller objects go up in a single multipart request
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Connections kept per host by the shared GCS client (google-cloud-storage keeps 10 by default)
+GCS_POOL_SIZE = 32
+
+URI_SCHEMES = ("gs", "file", "memory")
+
+
+class ObjectStore:
+    """
+    Minimal object-store interface the extractors and processors use.
+
+    Objects are addressed by key ("world_bank/world_bank_indicators_2020.csv")
+    and written whole, so a failed write never leaves a partial object
+    behind. download/upload default to get/put through memory; backends
+    that can stream to and from files override them.
+    """
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        """Store data under key and return the object's URI."""
+        raise NotImplementedError
+
+    def get(self, key: str) -> bytes:
+        """Body of the object at key (FileNotFoundError if there is none)."""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def size(self, key: str) -> Optional[int]:
+        """Size of the object at key in bytes, or None when it does not exist."""
+        raise NotImplementedError
+
+    def list(self, prefix: str = "") -> List[str]:
+        """Keys starting with prefix, sorted."""
+        raise NotImplementedError
+
+    def fingerprints(self, prefix: str = "") -> Dict[str, str]:
+        """
+        Key -> fingerprint of every object under prefix, from one listing. A
+        fingerprint changes whenever the object is rewritten.
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def uri(self, key: str) -> str:
+        raise NotImplementedError
+
+    def download(self, key: str, path: str) -> str:
+        """Copy the object at key to the local file path and return path."""
+        with open(path, "wb") as f:
+            f.write(self.get(key))
+        return path
+
+    def upload(self, path: str, key: str, content_type: Optional[str] = None) -> str:
+        """Store the local file path under key and return the object's URI."""
+        with open(path, "rb") as f:
+            return self.put(key, f.read(), content_type)
+
+
+class GCSStore(ObjectStore):
+    """
+    Google Cloud Storage bucket, optionally under a key prefix.
+
+    Objects larger than chunk_size are sent as a resumable upload, chunk by
+    chunk, so a dropped connection resumes from the last chunk instead of
+    starting over. Uses the process-wide client (see get_gcs_client) unless
+    client is given, e.g. an authenticated one from an Airflow GCSHook.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", chunk_size: int = DEFAULT_CHUNK_SIZE, client=None):
+        if client is None:
+            client = get_gcs_client()
+        self.bucket_name = bucket
+        self.bucket = client.bucket(bucket)
+        self.prefix = prefix.strip("/")
+        self.chunk_size = chunk_size
+
+    def _name(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        blob = self.bucket.blob(self._name(key), chunk_size=self.chunk_size)
+        blob.upload_from_file(io.BytesIO(data), size=len(data), content_type=content_type, rewind=True)
+        print(f"Uploaded {len(data)} bytes to {self.uri(key)}")
+        return self.uri(key)
+
+    def get(self, key: str) -> bytes:
+        from google.api_core.exceptions import NotFound
+
+        try:
+            return self.bucket.blob(self._name(key)).download_as_bytes()
+        except NotFound:
+            raise FileNotFoundError(self.uri(key))
+
+    def exists(self, key: str) -> bool:
+        return self.bucket.blob(self._name(key)).exists()
+
+    def size(self, key: str) -> Optional[int]:
+        blob = self.bucket.get_blob(self._name(key))
+        return blob.size if blob is not None else None
+
+    def list(self, prefix: str = "") -> List[str]:
+        start = len(self.prefix) + 1 if self.prefix else 0
+        return sorted(blob.name[start:] for blob in self.bucket.list_blobs(prefix=self._name(prefix)))
+
+    def fingerprints(self, prefix: str = "") -> Dict[str, str]:
+        # Generation and CRC32C come with the listing, so no per-object requests are needed
+        start = len(self.prefix) + 1 if self.prefix else 0
+        return {blob.name[start:]: f"{blob.generation}:{blob.crc32c}"
+                for blob in self.bucket.list_blobs(prefix=self._name(prefix))}
+
+    def delete(self, key: str):
+        self.bucket.blob(self._name(key)).delete()
+
+    def uri(self, key: str) -> str:
+        return f"gs://{self.bucket_name}/{self._name(key)}"
+
+    def download(self, key: str, path: str) -> str:
+        self.bucket.blob(self._name(key)).download_to_filename(path)
+        return path
+
+    def upload(self, path: str, key: str, content_type: Optional[str] = None) -> str:
+        blob = self.bucket.blob(self._name(key), chunk_size=self.chunk_size)
+        blob.upload_from_filename(path, content_type=content_type)
+        print(f"Uploaded {path} to {self.uri(key)}")
+        return self.uri(key)
+
+
+class LocalStore(ObjectStore):
+    """Directory-backed store for tests and local runs; writes are atomic renames."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        print(f"Wrote {len(data)} bytes to {path}")
+        return path
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def size(self, key: str) -> Optional[int]:
+        path = self._path(key)
+        return os.path.getsize(path) if os.path.exists(path) else None
+
+    def list(self, prefix: str = "") -> List[str]:
+        # Only walk the deepest directory the prefix names
+        directory = prefix.rpartition("/")[0]
+        keys = []
+        for dirpath, _, filenames in os.walk(self._path(directory) if directory else self.root):
+            relative = os.path.relpath(dirpath, self.root).replace(os.sep, "/")
+            for filename in filenames:
+                key = filename if relative == "." else f"{relative}/{filename}"
+                if key.startswith(prefix) and not filename.endswith(".tmp"):
+                    keys.append(key)
+        return sorted(keys)
+
+    def fingerprints(self, prefix: str = "") -> Dict[str, str]:
+        fingerprints = {}
+        for key in self.list(prefix):
+            stat = os.stat(self._path(key))
+            fingerprints[key] = f"{stat.st_mtime_ns}:{stat.st_size}"
+        return fingerprints
+
+    def delete(self, key: str):
+        os.remove(self._path(key))
+
+    def uri(self, key: str) -> str:
+        return self._path(key)
+
+
+class MemoryStore(ObjectStore):
+    """
+    In-process store for offline runs and benchmarks. Stores opened through
+    memory://<name> URIs are shared per name, so a processor reading
+    memory://bench/... sees what an earlier step wrote there.
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.objects: Dict[str, bytes] = {}
+        self.lock = threading.Lock()
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        with self.lock:
+            self.objects[key] = bytes(data)
+        return self.uri(key)
+
+    def get(self, key: str) -> bytes:
+        with self.lock:
+            if key not in self.objects:
+                raise FileNotFoundError(self.uri(key))
+            return self.objects[key]
+
+    def exists(self, key: str) -> bool:
+        with self.lock:
+            return key in self.objects
+
+    def size(self, key: str) -> Optional[int]:
+        with self.lock:
+            data = self.objects.get(key)
+        return len(data) if data is not None else None
+
+    def list(self, prefix: str = "") -> List[str]:
+        with self.lock:
+            return sorted(key for key in self.objects if key.startswith(prefix))
+
+    def fingerprints(self, prefix: str = "") -> Dict[str, str]:
+        with self.lock:
+            return {key: f"{zlib.crc32(data):08x}" for key, data in self.objects.items() if key.startswith(prefix)}
+
+    def delete(self, key: str):
+        with self.lock:
+            del self.objects[key]
+
+    def uri(self, key: str) -> str:
+        return f"memory://{self.name}/{key}"
+
+
+_gcs_client = None
+_stores: Dict[Tuple[str, str], ObjectStore] = {}
+_shared_lock = threading.Lock()
+
+
+def get_gcs_client(pool_size: int = GCS_POOL_SIZE):
+    """
+    Return the process-wide storage.Client, creating it on first use.
+
+    Credentials are resolved once per worker rather than per call, and the
+    client talks to GCS through an AuthorizedSession whose connection pool
+    is sized for parallel transfers.
+    """
+    global _gcs_client
+    with _shared_lock:
+        if _gcs_client is None:
+            import google.auth
+            from google.auth.transport.requests import AuthorizedSession
+            from google.cloud import storage
+            from requests.adapters import HTTPAdapter
+
+            credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+            session = AuthorizedSession(credentials)
+            session.mount("https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+            _gcs_client = storage.Client(project=project, credentials=credentials, _http=session)
+        return _gcs_client
+
+
+def parse_uri(uri: str) -> Tuple[str, str, str]:
+    """
+    Split a URI into (scheme, bucket, key).
+
+    gs://bucket/a/b -> ("gs", "bucket", "a/b"), memory://name/a/b ->
+    ("memory", "name", "a/b"); plain paths and file:// URIs give
+    ("file", "", path).
+    """
+    scheme, sep, rest = uri.partition("://")
+    if not sep:
+        return "file", "", uri
+    if scheme not in URI_SCHEMES:
+        raise ValueError(f"Unsupported URI scheme {scheme!r} in {uri}; expected one of {URI_SCHEMES}")
+    if scheme == "file":
+        return "file", "", rest
+    bucket, _, key = rest.partition("/")
+    return scheme, bucket, key.strip("/")
+
+
+def resolve(uri: str) -> Tuple[ObjectStore, str]:
+    """
+    The shared store holding uri and the object key (or key prefix) within it.
+
+    Stores are cached per bucket (or memory store name) for the life of the
+    process, so repeated calls reuse one client and its connections.
+    """
+    scheme, bucket, key = parse_uri(uri)
+    if scheme == "file":
+        root = os.sep if os.path.isabs(key) else os.curdir
+        bucket, key = root, os.path.relpath(key, root).replace(os.sep, "/")
+    with _shared_lock:
+        store = _stores.get((scheme, bucket))
+    if store is None:
+        store = {"gs": GCSStore, "file": LocalStore, "memory": MemoryStore}[scheme](bucket)
+        with _shared_lock:
+            store = _stores.setdefault((scheme, bucket), store)
+    return store, key
+
+
+def store_from_uri(uri: str) -> ObjectStore:
+    """GCSStore for gs://bucket[/prefix], MemoryStore for memory://name, LocalStore for a directory (file:// allowed)."""
+    scheme, bucket, key = parse_uri(uri)
+    if scheme == "gs":
+        return GCSStore(bucket, key)
+    if scheme == "memory":
+        return resolve(f"memory://{bucket}")[0]
+    return LocalStore(key)
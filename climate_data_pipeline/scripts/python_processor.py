@@ -1,9 +1,82 @@
 import pandas as pd
 import os
 import numpy as np
-from google.cloud import storage
 import tempfile
 import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from landing_format import CONTENT_TYPES, read_landing
+from object_store import resolve
+from schemas import CLIMATE_TRACE_SCHEMA, COMBINED_COLUMNS, WORLD_BANK_SCHEMA
+
+PARQUET_CONTENT_TYPE = CONTENT_TYPES[".parquet"]
+
+
+# Inputs up to this size are read straight into memory; larger ones are
+# spilled to a temporary file first (override with PROCESSOR_SPILL_BYTES)
+DEFAULT_SPILL_BYTES = 256 * 1024 * 1024
+
+
+# Year partitions combine_datasets downloads at once (override with PROCESSOR_FETCH_WORKERS)
+DEFAULT_FETCH_WORKERS = 8
+
+# Input fingerprints of each combined year, kept next to the incremental combine's partitions
+FINGERPRINTS_FILE = "_fingerprints.json"
+
+
+def spill_threshold():
+    return int(os.environ.get("PROCESSOR_SPILL_BYTES", DEFAULT_SPILL_BYTES))
+
+
+def fetch_workers():
+    return int(os.environ.get("PROCESSOR_FETCH_WORKERS", DEFAULT_FETCH_WORKERS))
+
+
+def read_input(input_uri, schema=None):
+    """
+    Read a landed or processed file (Parquet or CSV) into a DataFrame, typed
+    and renamed by schema when one is given (see schemas.py).
+
+    Objects up to the spill threshold are read into a buffer without
+    touching local disk; larger ones (or ones whose size is unknown) are
+    downloaded to a temporary file first to bound memory use.
+    """
+    store, key = resolve(input_uri)
+    size = store.size(key)
+    if size is not None and size <= spill_threshold():
+        print(f"Reading {input_uri} ({size} bytes) in memory")
+        return read_landing(key, io.BytesIO(store.get(key)), schema)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        local_path = os.path.join(temp_dir, os.path.basename(key))
+        store.download(key, local_path)
+        print(f"Downloaded {input_uri} to {local_path}")
+        return read_landing(local_path, schema=schema)
+
+
+def parquet_bytes(df):
+    """Serialise df as a Parquet file body in memory."""
+    buffer = io.BytesIO()
+    df.to_parquet(buffer)
+    return buffer.getvalue()
+
+
+def replace_output(output_uri, file_name, data):
+    """
+    Replace everything under the output_uri "directory" with data (a
+    Parquet file body), stored as output_uri/file_name. Returns the new
+    object's URI.
+    """
+    store, prefix = resolve(output_uri)
+
+    # Delete existing directory if it exists
+    for key in store.list(f"{prefix}/"):
+        store.delete(key)
+        print(f"Deleted existing blob: {key}")
+
+    # Upload new file
+    return store.put(f"{prefix}/{file_name}", data, PARQUET_CONTENT_TYPE)
 
 def download_from_gcs(gcs_path, local_path=None):
     """
@@ -19,9 +92,8 @@ def download_from_gcs(gcs_path, local_path=None):
     # Parse the GCS path
     if not gcs_path.startswith('gs://'):
         return gcs_path  # Already a local path
-        
-    bucket_name = gcs_path.replace('gs://', '').split('/')[0]
-    blob_name = '/'.join(gcs_path.replace(f'gs://{bucket_name}/', '').split('/'))
+
+    store, blob_name = resolve(gcs_path)
     
     # If no local path provided, create a temp file
     if not local_path:
@@ -34,10 +106,7 @@ def download_from_gcs(gcs_path, local_path=None):
     
     # Download the file
     try:
-        client = storage.Client()
-        bucket = client.bucket(bucket_name)
-        blob = bucket.blob(blob_name)
-        blob.download_to_filename(local_path)
+        store.download(blob_name, local_path)
         print(f"Downloaded {gcs_path} to {local_path}")
         return local_path
     except Exception as e:
@@ -58,15 +127,11 @@ def upload_to_gcs(local_path, gcs_path):
     """
     if not gcs_path.startswith('gs://'):
         return gcs_path  # Not a GCS path
-        
-    bucket_name = gcs_path.replace('gs://', '').split('/')[0]
-    blob_name = '/'.join(gcs_path.replace(f'gs://{bucket_name}/', '').split('/'))
+
+    store, blob_name = resolve(gcs_path)
     
     try:
-        client = storage.Client()
-        bucket = client.bucket(bucket_name)
-        blob = bucket.blob(blob_name)
-        blob.upload_from_filename(local_path)
+        store.upload(local_path, blob_name)
         print(f"Uploaded {local_path} to {gcs_path}")
         return gcs_path
     except Exception as e:
@@ -74,11 +139,11 @@ def upload_to_gcs(local_path, gcs_path):
         return None
 
 def process_world_bank_data(input_path, output_path):
-    """Process World Bank data using Pandas and store in GCS"""
-    import pandas as pd
-    import os
-    from google.cloud import storage
-    import tempfile
+    """
+    Process World Bank data using Pandas and store it under output_path/<year>.
+
+    input_path and output_path are gs://, memory:// or local paths (see object_store.resolve).
+    """
 
     print(f"Processing World Bank data from: {input_path}")
 
@@ -86,75 +151,37 @@ def process_world_bank_data(input_path, output_path):
     year = os.path.basename(input_path).split('.')[0].split('_')[-1]
     print(f"Processing data for year: {year}")
 
-    # Create a temp directory for processing
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Download the input file from GCS
-        client = storage.Client()
-        bucket_name = input_path.replace("gs://", "").split("/")[0]
-        blob_path = "/".join(input_path.replace(f"gs://{bucket_name}/", "").split("/"))
-
-        local_input_path = os.path.join(temp_dir, os.path.basename(input_path))
-
-        bucket = client.bucket(bucket_name)
-        blob = bucket.blob(blob_path)
-        blob.download_to_filename(local_input_path)
-        print(f"Downloaded {input_path} to {local_input_path}")
-
-        # Read the CSV data
-        df = pd.read_csv(local_input_path)
-
-        # Clean column names - lowercase, replace spaces with underscores, strip whitespace
-        df.columns = [col.lower().replace(' ', '_').replace('.', '_').strip() for col in df.columns]
-
-
-        # Print column names for debugging
-        print(f"Columns after cleaning: {df.columns.tolist()}")
-
-        # Convert numeric columns
-        for col in df.columns:
-            if col != 'country':
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+    # Read the landed data (typed Parquet or CSV), in memory unless it is very large.
+    # The schema cleans column names (SP.POP.TOTL -> sp_pop_totl) and types CSV columns while parsing
+    df = read_input(input_path, WORLD_BANK_SCHEMA)
 
-        # Add calculated columns
-        if 'sp_pop_totl' in df.columns and 'en_atm_co2e_pc' in df.columns:
-            df['total_emissions'] = df['sp_pop_totl'] * df['en_atm_co2e_pc']
+    # Print column names for debugging
+    print(f"Columns after cleaning: {df.columns.tolist()}")
 
-        # Add year column if not present
-        if 'year' not in df.columns:
-            df['year'] = int(year)
+    # Add calculated columns
+    if 'sp_pop_totl' in df.columns and 'en_atm_co2e_pc' in df.columns:
+        df['total_emissions'] = df['sp_pop_totl'] * df['en_atm_co2e_pc']
 
-        # Write to a temporary parquet file
-        local_output_file = os.path.join(temp_dir, "data.parquet")
-        df.to_parquet(local_output_file)
+    # Add year column if not present
+    if 'year' not in df.columns:
+        df['year'] = int(year)
 
-        # Check if year-specific output directory already exists
-        year_output_path = f"{output_path}/{year}"
-        output_file = f"{year_output_path}/data.parquet"
+    # Check if year-specific output directory already exists
+    year_output_path = f"{output_path}/{year}"
+    output_file = f"{year_output_path}/data.parquet"
 
-        # Upload to GCS
-        output_bucket_name = year_output_path.replace("gs://", "").split("/")[0]
-        output_blob_path = "/".join(year_output_path.replace(f"gs://{output_bucket_name}/", "").split("/"))
-
-        output_bucket = client.bucket(output_bucket_name)
-
-        # Delete existing directory if it exists
-        for blob in output_bucket.list_blobs(prefix=f"{output_blob_path}/"):
-            blob.delete()
-            print(f"Deleted existing blob: {blob.name}")
-
-        # Upload new file
-        output_blob = output_bucket.blob(f"{output_blob_path}/data.parquet")
-        output_blob.upload_from_filename(local_output_file)
-        print(f"Uploaded processed data to {output_file}")
+    # Replace the year's previous output, uploading the Parquet straight from memory
+    replace_output(year_output_path, "data.parquet", parquet_bytes(df))
+    print(f"Uploaded processed data to {output_file}")
 
     return year_output_path
 
 def process_climate_trace_data(input_path, output_path):
-    """Process Climate Trace data using Pandas and store in GCS"""
-    import pandas as pd
-    import os
-    from google.cloud import storage
-    import tempfile
+    """
+    Process Climate Trace data using Pandas and store it under output_path/<year>.
+
+    input_path and output_path are gs://, memory:// or local paths (see object_store.resolve).
+    """
 
     print(f"Processing Climate Trace data from: {input_path}")
 
@@ -162,239 +189,251 @@ def process_climate_trace_data(input_path, output_path):
     year = os.path.basename(input_path).split('.')[0].split('_')[-1]
     print(f"Processing data for year: {year}")
 
-    # Create a temp directory for processing
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Download the input file from GCS
-        client = storage.Client()
-        bucket_name = input_path.replace("gs://", "").split("/")[0]
-        blob_path = "/".join(input_path.replace(f"gs://{bucket_name}/", "").split("/"))
-
-        local_input_path = os.path.join(temp_dir, os.path.basename(input_path))
-
-        bucket = client.bucket(bucket_name)
-        blob = bucket.blob(blob_path)
-        blob.download_to_filename(local_input_path)
-        print(f"Downloaded {input_path} to {local_input_path}")
+    # Read the landed data (typed Parquet or CSV), in memory unless it is very large.
+    # The schema cleans column names and types CSV columns while parsing
+    df = read_input(input_path, CLIMATE_TRACE_SCHEMA)
 
-        # Read the CSV data
-        df = pd.read_csv(local_input_path)
+    # Print the column names to debug
+    print(f"Columns in the data after cleaning: {df.columns.tolist()}")
 
-        # Clean column names - lowercase, replace spaces with underscores, strip whitespace
-        df.columns = [col.lower().replace(' ', '_').replace('.', '_').strip() for col in df.columns]
+    # Ensure year is integer
+    if 'year' in df.columns:
+        df['year'] = df['year'].astype(int)
+    else:
+        df['year'] = int(year)
 
+    # Create aggregations by country
+    result_df = df.groupby(['country', 'year']).agg({
+        'co2': 'sum',
+        'ch4': 'sum',
+        'n2o': 'sum',
+        'co2e_100yr': 'sum',
+        'co2e_20yr': 'sum'
+    }).reset_index()
 
-        # Print the column names to debug
-        print(f"Columns in the data after cleaning: {df.columns.tolist()}")
 
-        # Convert all numeric columns
-        for col in df.columns:
-            if col not in ['country', 'year']:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+    # Clean column names again just to be sure
+    result_df.columns = [col.lower().replace(' ', '_').strip() for col in result_df.columns]
 
-        # Ensure year is integer
-        if 'year' in df.columns:
-            df['year'] = df['year'].astype(int)
-        else:
-            df['year'] = int(year)
+    # Check if year-specific output directory already exists
+    year_output_path = f"{output_path}/{year}"
+    output_file = f"{year_output_path}/data.parquet"
 
-        # Create aggregations by country
-        result_df = df.groupby(['country', 'year']).agg({
-            'co2': 'sum',
-            'ch4': 'sum',
-            'n2o': 'sum',
-            'co2e_100yr': 'sum',
-            'co2e_20yr': 'sum'
-        }).reset_index()
+    # Replace the year's previous output, uploading the Parquet straight from memory
+    replace_output(year_output_path, "data.parquet", parquet_bytes(result_df))
+    print(f"Uploaded processed data to {output_file}")
 
+    return year_output_path
 
-        # Clean column names again just to be sure
-        result_df.columns = [col.lower().replace(' ', '_').strip() for col in result_df.columns]
-
-        # Write to a temporary parquet file
-        local_output_file = os.path.join(temp_dir, "data.parquet")
-        result_df.to_parquet(local_output_file)
+def partition_year(key, prefix, file_name="data.parquet"):
+    """The year of a <prefix>/<year>/<file_name> partition key, or None for any other key."""
+    parts = key[len(prefix):].strip("/").split("/")
+    if len(parts) == 2 and parts[0].isdigit() and parts[1] == file_name:
+        return parts[0]
+    return None
 
-        # Check if year-specific output directory already exists
-        year_output_path = f"{output_path}/{year}"
-        output_file = f"{year_output_path}/data.parquet"
 
-        # Upload to GCS
-        output_bucket_name = year_output_path.replace("gs://", "").split("/")[0]
-        output_blob_path = "/".join(year_output_path.replace(f"gs://{output_bucket_name}/", "").split("/"))
+def partition_index(store, prefix, file_name="data.parquet"):
+    """Year -> key of every <prefix>/<year>/<file_name> partition, from a single listing."""
+    partitions = {}
+    for key in store.list(f"{prefix}/"):
+        year = partition_year(key, prefix, file_name)
+        if year is not None:
+            partitions[year] = key
+    return partitions
 
-        output_bucket = client.bucket(output_bucket_name)
 
-        # Delete existing directory if it exists
-        for blob in output_bucket.list_blobs(prefix=f"{output_blob_path}/"):
-            blob.delete()
-            print(f"Deleted existing blob: {blob.name}")
+def read_partition(store, key, year, name):
+    """Read one year partition, or report the error and return None."""
+    print(f"Processing {name} data for year {year}")
+    try:
+        df = read_input(store.uri(key))
+    except Exception as e:
+        print(f"Error reading {name} data for year {year}: {e}")
+        return None
+    # Ensure year column exists
+    if 'year' not in df.columns:
+        df['year'] = int(year)
+    return df
 
-        # Upload new file
-        output_blob = output_bucket.blob(f"{output_blob_path}/data.parquet")
-        output_blob.upload_from_filename(local_output_file)
-        print(f"Uploaded processed data to {output_file}")
 
-    return year_output_path
+def read_partitions(store, partitions, name, max_workers):
+    """
+    Read the partitions of partition_index in parallel and return their
+    DataFrames in year order. A partition that cannot be read is reported
+    and left out.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(lambda year: read_partition(store, partitions[year], year, name),
+                                   sorted(partitions)))
+    return [df for df in frames if df is not None]
+
+
+def merge_datasets(combined_wb_df, combined_ct_df):
+    """Outer-join World Bank and Climate Trace frames on country and year"""
+    # Merge datasets on country and year
+    if not combined_wb_df.empty and not combined_ct_df.empty:
+        # Clean column names to ensure they're lowercase
+        combined_wb_df.columns = [col.lower().replace(' ', '_').strip() for col in combined_wb_df.columns]
+        combined_ct_df.columns = [col.lower().replace(' ', '_').strip() for col in combined_ct_df.columns]
+
+        print(f"World Bank columns: {combined_wb_df.columns.tolist()}")
+        print(f"Climate Trace columns: {combined_ct_df.columns.tolist()}")
+
+        # Merge on country and year
+        combined_df = pd.merge(combined_wb_df, combined_ct_df, on=['country', 'year'], how='outer')
+
+        # Handle any column name collisions
+        # If we have total_emissions from both datasets, rename one
+        for col in combined_df.columns:
+            if col.endswith('_x') or col.endswith('_y'):
+                base_col = col[:-2]
+                if f"{base_col}_x" in combined_df.columns and f"{base_col}_y" in combined_df.columns:
+                    combined_df = combined_df.rename(columns={
+                        f"{base_col}_x": f"{base_col}_wb",
+                        f"{base_col}_y": f"{base_col}_ct"
+                    })
+
+        print(f"Combined data has {len(combined_df)} rows and columns: {combined_df.columns.tolist()}")
+    elif not combined_wb_df.empty:
+        combined_df = combined_wb_df
+        print(f"Only World Bank data available, {len(combined_df)} rows")
+    elif not combined_ct_df.empty:
+        combined_df = combined_ct_df
+        print(f"Only Climate Trace data available, {len(combined_df)} rows")
+    else:
+        # Create an empty dataframe with expected columns
+        combined_df = pd.DataFrame(columns=[
+            'country', 'year', 'sp_pop_totl', 'ny_gdp_pcap_cd', 'en_atm_co2e_pc',
+            'total_emissions', 'co2', 'ch4', 'n2o', 'total', 'co2e_20yr', 'energy_percent'
+        ])
+        print("No data available for either dataset")
+
+    # Clean column names one last time
+    combined_df.columns = [col.lower().replace(' ', '_').strip() for col in combined_df.columns]
+
+    return combined_df
+
+
+def conform_columns(df):
+    """Give a combined partition every COMBINED_COLUMNS column (NaN when missing) in a fixed order."""
+    for col in COMBINED_COLUMNS:
+        if col not in df.columns:
+            df[col] = np.nan
+    return df[COMBINED_COLUMNS + [col for col in df.columns if col not in COMBINED_COLUMNS]]
+
+
+def combine_incremental(wb_store, wb_prefix, ct_store, ct_prefix, output_path, max_workers):
+    """
+    Re-merge only the years whose inputs changed since the last run.
+
+    The combined dataset is kept as output_path/<year>/data.parquet. Each
+    year's input fingerprints (GCS generation and CRC32C, from one listing
+    per dataset) are recorded in output_path/_fingerprints.json; a year is
+    rewritten when they differ from the recorded ones or its partition is
+    missing, and deleted when its inputs are gone. A year whose input cannot
+    be read keeps no fingerprint, so the next run retries it.
+    """
+    datasets = [("World Bank", wb_store, wb_prefix), ("Climate Trace", ct_store, ct_prefix)]
+    partitions = {name: {} for name, _, _ in datasets}
+    inputs = {}
+    for name, store, prefix in datasets:
+        for key, fingerprint in store.fingerprints(f"{prefix}/").items():
+            year = partition_year(key, prefix)
+            if year is not None:
+                partitions[name][year] = key
+                inputs.setdefault(year, {dataset: None for dataset, _, _ in datasets})[name] = fingerprint
+
+    out_store, out_prefix = resolve(output_path)
+    fingerprints_key = f"{out_prefix}/{FINGERPRINTS_FILE}"
+    previous = json.loads(out_store.get(fingerprints_key)) if out_store.exists(fingerprints_key) else {}
+    written = partition_index(out_store, out_prefix)
+
+    changed = sorted(year for year in inputs if inputs[year] != previous.get(year) or year not in written)
+    print(f"Combining {len(changed)} of {len(inputs)} years whose inputs changed: {changed}")
+
+    for year in sorted(set(written) - set(inputs)):
+        out_store.delete(written[year])
+        print(f"Deleted combined data for year {year}, which has no inputs any more")
+
+    def combine_year(year):
+        frames = []
+        for name, store, _ in datasets:
+            df = pd.DataFrame(columns=['country', 'year'])
+            if year in partitions[name]:
+                df = read_partition(store, partitions[name][year], year, name)
+                if df is None:
+                    return False
+            frames.append(df)
+        combined_df = conform_columns(merge_datasets(*frames))
+        out_store.put(f"{out_prefix}/{year}/data.parquet", parquet_bytes(combined_df), PARQUET_CONTENT_TYPE)
+        return True
+
+    fingerprints = {year: previous[year] for year in inputs if year in previous and year not in changed}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for year, combined in zip(changed, executor.map(combine_year, changed)):
+            if combined:
+                fingerprints[year] = inputs[year]
+
+    out_store.put(fingerprints_key, json.dumps(fingerprints, indent=2, sort_keys=True).encode("utf-8"),
+                  "application/json")
+
+    # A full combine's single file would duplicate the partitions
+    if out_store.exists(f"{out_prefix}/combined_data.parquet"):
+        out_store.delete(f"{out_prefix}/combined_data.parquet")
+    print(f"Uploaded combined data for {len(changed)} years to {output_path}/<year>/data.parquet")
+
+    return output_path
+
+
+def combine_datasets(world_bank_path, climate_trace_path, output_path, max_workers=None, incremental=False):
+    """
+    Combine World Bank and Climate Trace data for all years (paths as in process_world_bank_data).
 
-def combine_datasets(world_bank_path, climate_trace_path, output_path):
-    """Combine World Bank and Climate Trace data for all years"""
-    import pandas as pd
-    import os
-    from google.cloud import storage
-    import tempfile
+    Year partitions are fetched max_workers at a time (default PROCESSOR_FETCH_WORKERS, or 8).
+    By default everything under output_path is replaced by one combined_data.parquet;
+    with incremental=True only changed years are rewritten (see combine_incremental).
+    """
 
     print(f"Combining datasets from World Bank: {world_bank_path} and Climate Trace: {climate_trace_path}")
 
-    # Create a temp directory for processing
-    with tempfile.TemporaryDirectory() as temp_dir:
-        client = storage.Client()
-
-        # Get all available years from both datasets
-        wb_bucket_name = world_bank_path.replace("gs://", "").split("/")[0]
-        wb_prefix = "/".join(world_bank_path.replace(f"gs://{wb_bucket_name}/", "").split("/"))
-        wb_bucket = client.bucket(wb_bucket_name)
-
-        ct_bucket_name = climate_trace_path.replace("gs://", "").split("/")[0]
-        ct_prefix = "/".join(climate_trace_path.replace(f"gs://{ct_bucket_name}/", "").split("/"))
-        ct_bucket = client.bucket(ct_bucket_name)
-
-        # Find all year directories
-        wb_years = set()
-        for blob in wb_bucket.list_blobs(prefix=wb_prefix):
-            # Extract year from path
-            parts = blob.name.replace(wb_prefix, "").strip("/").split("/")
-            if len(parts) >= 1 and parts[0].isdigit():
-                wb_years.add(parts[0])
-
-        ct_years = set()
-        for blob in ct_bucket.list_blobs(prefix=ct_prefix):
-            # Extract year from path
-            parts = blob.name.replace(ct_prefix, "").strip("/").split("/")
-            if len(parts) >= 1 and parts[0].isdigit():
-                ct_years.add(parts[0])
-
-        # Get intersection of years available in both datasets
-        all_years = wb_years.union(ct_years)
-        print(f"Processing years: {all_years}")
-
-        # Initialize dataframes to hold all data
-        all_wb_data = []
-        all_ct_data = []
-
-        # Process each year
-        for year in all_years:
-            # Process World Bank data if available
-            wb_year_path = f"{world_bank_path}/{year}/data.parquet"
-            wb_exists = any(blob.name == f"{wb_prefix}/{year}/data.parquet" for blob in wb_bucket.list_blobs(prefix=f"{wb_prefix}/{year}"))
-
-            if wb_exists:
-                print(f"Processing World Bank data for year {year}")
-                wb_local_path = os.path.join(temp_dir, f"wb_{year}.parquet")
-                wb_blob = wb_bucket.blob(f"{wb_prefix}/{year}/data.parquet")
-                wb_blob.download_to_filename(wb_local_path)
-
-                try:
-                    wb_df = pd.read_parquet(wb_local_path)
-                    # Ensure year column exists
-                    if 'year' not in wb_df.columns:
-                        wb_df['year'] = int(year)
-                    all_wb_data.append(wb_df)
-                except Exception as e:
-                    print(f"Error reading World Bank data for year {year}: {e}")
-
-            # Process Climate Trace data if available
-            ct_year_path = f"{climate_trace_path}/{year}/data.parquet"
-            ct_exists = any(blob.name == f"{ct_prefix}/{year}/data.parquet" for blob in ct_bucket.list_blobs(prefix=f"{ct_prefix}/{year}"))
-
-            if ct_exists:
-                print(f"Processing Climate Trace data for year {year}")
-                ct_local_path = os.path.join(temp_dir, f"ct_{year}.parquet")
-                ct_blob = ct_bucket.blob(f"{ct_prefix}/{year}/data.parquet")
-                ct_blob.download_to_filename(ct_local_path)
-
-                try:
-                    ct_df = pd.read_parquet(ct_local_path)
-                    # Ensure year column exists
-                    if 'year' not in ct_df.columns:
-                        ct_df['year'] = int(year)
-                    all_ct_data.append(ct_df)
-                except Exception as e:
-                    print(f"Error reading Climate Trace data for year {year}: {e}")
-
-        # Combine all years' data
-        if all_wb_data:
-            combined_wb_df = pd.concat(all_wb_data, ignore_index=True)
-            print(f"Combined World Bank data has {len(combined_wb_df)} rows")
-        else:
-            combined_wb_df = pd.DataFrame(columns=['country', 'year'])
-            print("No World Bank data available")
-
-        if all_ct_data:
-            combined_ct_df = pd.concat(all_ct_data, ignore_index=True)
-            print(f"Combined Climate Trace data has {len(combined_ct_df)} rows")
-        else:
-            combined_ct_df = pd.DataFrame(columns=['country', 'year'])
-            print("No Climate Trace data available")
-
-        # Merge datasets on country and year
-        if not combined_wb_df.empty and not combined_ct_df.empty:
-            # Clean column names to ensure they're lowercase
-            combined_wb_df.columns = [col.lower().replace(' ', '_').strip() for col in combined_wb_df.columns]
-            combined_ct_df.columns = [col.lower().replace(' ', '_').strip() for col in combined_ct_df.columns]
-
-            print(f"World Bank columns: {combined_wb_df.columns.tolist()}")
-            print(f"Climate Trace columns: {combined_ct_df.columns.tolist()}")
-
-            # Merge on country and year
-            combined_df = pd.merge(combined_wb_df, combined_ct_df, on=['country', 'year'], how='outer')
-
-            # Handle any column name collisions
-            # If we have total_emissions from both datasets, rename one
-            for col in combined_df.columns:
-                if col.endswith('_x') or col.endswith('_y'):
-                    base_col = col[:-2]
-                    if f"{base_col}_x" in combined_df.columns and f"{base_col}_y" in combined_df.columns:
-                        combined_df = combined_df.rename(columns={
-                            f"{base_col}_x": f"{base_col}_wb",
-                            f"{base_col}_y": f"{base_col}_ct"
-                        })
-
-            print(f"Combined data has {len(combined_df)} rows and columns: {combined_df.columns.tolist()}")
-        elif not combined_wb_df.empty:
-            combined_df = combined_wb_df
-            print(f"Only World Bank data available, {len(combined_df)} rows")
-        elif not combined_ct_df.empty:
-            combined_df = combined_ct_df
-            print(f"Only Climate Trace data available, {len(combined_df)} rows")
-        else:
-            # Create an empty dataframe with expected columns
-            combined_df = pd.DataFrame(columns=[
-                'country', 'year', 'sp_pop_totl', 'ny_gdp_pcap_cd', 'en_atm_co2e_pc',
-                'total_emissions', 'co2', 'ch4', 'n2o', 'total', 'co2e_20yr', 'energy_percent'
-            ])
-            print("No data available for either dataset")
-
-        # Clean column names one last time
-        combined_df.columns = [col.lower().replace(' ', '_').strip() for col in combined_df.columns]
-
-        # Write combined data to temporary file
-        local_combined_file = os.path.join(temp_dir, "combined_data.parquet")
-        combined_df.to_parquet(local_combined_file)
-
-        # Upload to GCS
-        output_bucket_name = output_path.replace("gs://", "").split("/")[0]
-        output_blob_path = "/".join(output_path.replace(f"gs://{output_bucket_name}/", "").split("/"))
-
-        output_bucket = client.bucket(output_bucket_name)
-
-        # Delete existing files if they exist
-        for blob in output_bucket.list_blobs(prefix=output_blob_path):
-            blob.delete()
-            print(f"Deleted existing blob: {blob.name}")
-
-        # Upload new file
-        output_blob = output_bucket.blob(f"{output_blob_path}/combined_data.parquet")
-        output_blob.upload_from_filename(local_combined_file)
-        print(f"Uploaded combined data to {output_path}/combined_data.parquet")
+    wb_store, wb_prefix = resolve(world_bank_path)
+    ct_store, ct_prefix = resolve(climate_trace_path)
+    workers = max_workers or fetch_workers()
+    if incremental:
+        return combine_incremental(wb_store, wb_prefix, ct_store, ct_prefix, output_path, workers)
+
+    # Index the available year partitions with one listing per dataset
+    wb_partitions = partition_index(wb_store, wb_prefix)
+    ct_partitions = partition_index(ct_store, ct_prefix)
+
+    # Get all years available in either dataset
+    all_years = sorted(set(wb_partitions) | set(ct_partitions))
+    print(f"Processing years: {all_years}")
+
+    # Download and decode every partition concurrently
+    all_wb_data = read_partitions(wb_store, wb_partitions, "World Bank", workers)
+    all_ct_data = read_partitions(ct_store, ct_partitions, "Climate Trace", workers)
+
+    # Combine all years' data
+    if all_wb_data:
+        combined_wb_df = pd.concat(all_wb_data, ignore_index=True)
+        print(f"Combined World Bank data has {len(combined_wb_df)} rows")
+    else:
+        combined_wb_df = pd.DataFrame(columns=['country', 'year'])
+        print("No World Bank data available")
+
+    if all_ct_data:
+        combined_ct_df = pd.concat(all_ct_data, ignore_index=True)
+        print(f"Combined Climate Trace data has {len(combined_ct_df)} rows")
+    else:
+        combined_ct_df = pd.DataFrame(columns=['country', 'year'])
+        print("No Climate Trace data available")
+
+    combined_df = merge_datasets(combined_wb_df, combined_ct_df)
+
+    # Replace the previous combined output, uploading the Parquet straight from memory
+    replace_output(output_path, "combined_data.parquet", parquet_bytes(combined_df))
+    print(f"Uploaded combined data to {output_path}/combined_data.parquet")
 
     return output_path
\ No newline at end of file
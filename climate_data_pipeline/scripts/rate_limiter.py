@@ -0,0 +1,90 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Requests per second and burst size per API host. These are deliberately a
+# little below what the providers tolerate; tune them with the extraction metrics.
+DEFAULT_HOST_LIMITS = {
+    "api.worldbank.org": (5.0, 10),
+    "api.climatetrace.org": (4.0, 8),
+}
+
+# Limit for any other host
+DEFAULT_LIMIT = (2.0, 4)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at rate per second up to burst. Each request
+    takes one token, waiting if none is available. pause() blocks the bucket
+    entirely until a given time, which is how Retry-After is honoured.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self) -> float:
+        """Take a token, blocking until one is available. Returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for the next seconds (e.g. after a 429)."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            # Start from an empty bucket afterwards so we do not burst straight back in
+            self.tokens = 0.0
+            self.updated = self.paused_until
+
+
+class RateLimiter:
+    """Per-host token buckets shared by every request going through the transport."""
+
+    def __init__(self, host_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 default_limit: Tuple[float, int] = DEFAULT_LIMIT):
+        self.host_limits = dict(DEFAULT_HOST_LIMITS if host_limits is None else host_limits)
+        self.default_limit = default_limit
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        """Return the bucket for the host of url, creating it on first use."""
+        host = urlsplit(url).hostname or ""
+        with self.lock:
+            if host not in self.buckets:
+                rate, burst = self.host_limits.get(host, self.default_limit)
+                self.buckets[host] = TokenBucket(rate, burst)
+            return self.buckets[host]
+
+    def acquire(self, url: str) -> float:
+        """Wait for permission to send a request to the host of url."""
+        return self.bucket(url).acquire()
+
+    def pause(self, url: str, seconds: float):
+        """Hold back every request to the host of url for seconds."""
+        print(f"Rate limited by {urlsplit(url).hostname}; pausing requests for {seconds:.1f}s")
+        self.bucket(url).pause(seconds)
@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+
+from arrow_stream import batches_to_table
+
+MANIFEST_NAME = "_manifest.json"
+
+
+class ResponseArchive:
+    """
+    Raw API items of every completed year, for reprocessing without refetching.
+
+    A year of a source is archived once it completed, as zstd-compressed
+    NDJSON (one raw API item per line), one file per request batch:
+
+        <root>/<source>/<year>/batch-00000.ndjson.zst
+        <root>/<source>/<year>/_manifest.json
+
+    The manifest lists each batch file with the request keys it covers (the
+    countries of a Climate Trace batch, the indicator of a World Bank
+    listing), which replay passes back to the source's parse function. A
+    year is written to a temporary folder and swapped in whole, so replay
+    never sees a mix of two extractions.
+
+    Streaming extractions keep parsed Arrow record batches rather than raw
+    items; their batches are stored as zstd-compressed Arrow IPC files
+    (batch-00000.arrow) and read back as record batches.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def year_dir(self, source: str, year: int) -> str:
+        return os.path.join(self.root, source, str(year))
+
+    def write_year(self, source: str, year: int, batches: Sequence[Tuple[Sequence[str], List[Any]]]) -> str:
+        """Archive the (keys, raw items) batches of a completed year; returns its folder."""
+        year_dir = self.year_dir(source, year)
+        tmp_dir = f"{year_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        entries = []
+        for i, (keys, items) in enumerate(batches):
+            if items and isinstance(items[0], pa.RecordBatch):
+                name = f"batch-{i:05d}.arrow"
+                table = batches_to_table(items)
+                options = pa.ipc.IpcWriteOptions(compression="zstd")
+                with pa.OSFile(os.path.join(tmp_dir, name), "wb") as sink:
+                    with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                        writer.write_table(table)
+                entries.append({"file": name, "keys": list(keys), "items": table.num_rows})
+                continue
+
+            name = f"batch-{i:05d}.ndjson.zst"
+            with pa.CompressedOutputStream(os.path.join(tmp_dir, name), "zstd") as out:
+                for item in items:
+                    out.write(json.dumps(item, separators=(",", ":")).encode("utf-8") + b"\n")
+            entries.append({"file": name, "keys": list(keys), "items": len(items)})
+
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as f:
+            json.dump({"source": source, "year": int(year), "archived_at": time.time(), "batches": entries}, f)
+
+        # Swap the new year in; the previous archive of the year is removed afterwards
+        old_dir = f"{tmp_dir}.old"
+        if os.path.exists(year_dir):
+            os.replace(year_dir, old_dir)
+        os.replace(tmp_dir, year_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+        print(f"Archived {sum(entry['items'] for entry in entries)} raw {source} items for {year} "
+              f"in {len(entries)} batches to {year_dir}")
+        return year_dir
+
+    def read_year(self, source: str, year: int) -> List[Tuple[List[str], List[Any]]]:
+        """The archived (keys, raw items) batches of a year, in request order."""
+        year_dir = self.year_dir(source, year)
+        manifest_path = os.path.join(year_dir, MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No archived {source} responses for {year} in {year_dir}")
+
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+        batches = []
+        for entry in manifest["batches"]:
+            path = os.path.join(year_dir, entry["file"])
+            if entry["file"].endswith(".arrow"):
+                with pa.OSFile(path) as f:
+                    batches.append((entry["keys"], pa.ipc.open_file(f).read_all().to_batches()))
+                continue
+            with pa.CompressedInputStream(pa.OSFile(path), "zstd") as stream:
+                lines = stream.read().splitlines()
+            batches.append((entry["keys"], [json.loads(line) for line in lines if line]))
+        return batches
+
+
+def archive_from_env() -> Optional[ResponseArchive]:
+    """The archive in EXTRACTOR_ARCHIVE_DIR, or None when archiving is off."""
+    root = os.environ.get("EXTRACTOR_ARCHIVE_DIR")
+    return ResponseArchive(root) if root else None
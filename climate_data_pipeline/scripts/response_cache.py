@@ -0,0 +1,169 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Response headers worth keeping; the body is stored decoded, so encoding/length are dropped
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control")
+
+
+class OfflineCacheMiss(requests.RequestException):
+    """Raised in offline mode when a request is not in the cache."""
+
+
+def normalize_url(url: str, params: Optional[Dict] = None) -> str:
+    """
+    Canonical cache key for a GET: lowercase scheme/host, query merged with
+    params and sorted, fragment dropped. Commas in values (country lists) are
+    kept literal so keys stay readable.
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += [(str(k), str(v)) for k, v in params.items()]
+    query = urlencode(sorted(query), safe=",;:")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ""))
+
+
+class CachedEntry:
+    """A cached response plus the metadata needed to revalidate it."""
+
+    def __init__(self, key: str, status: int, headers: Dict[str, str], body: bytes, stored_at: float):
+        self.key = key
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stored_at = stored_at
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get("ETag")
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get("Last-Modified")
+
+    def to_response(self) -> requests.Response:
+        """Rebuild a requests.Response so callers cannot tell it came from the cache."""
+        response = requests.Response()
+        response.status_code = self.status
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.body
+        response._content_consumed = True
+        response.url = self.key
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or "utf-8"
+        response.from_cache = True
+        return response
+
+
+class ResponseCache:
+    """
+    Opt-in persistent cache of successful GET responses, stored in SQLite.
+
+    Entries younger than ttl seconds are served directly. Older entries are
+    revalidated with If-None-Match / If-Modified-Since when the server gave an
+    ETag or Last-Modified, otherwise refetched. The database is kept under
+    max_bytes by evicting the least recently used entries. In offline mode
+    every lookup is served from the cache regardless of age, and misses raise
+    OfflineCacheMiss, which makes extraction deterministic for tests.
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, max_bytes: int = 512 * 1024 * 1024,
+                 offline: bool = False):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, status INTEGER, headers TEXT, body BLOB,"
+            " size INTEGER, stored_at REAL, accessed_at REAL)"
+        )
+        self.conn.commit()
+
+    def lookup(self, key: str) -> Optional[CachedEntry]:
+        """Return the cached entry for key (fresh or stale), or None."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT status, headers, body, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+
+        status, headers, body, stored_at = row
+        return CachedEntry(key, status, json.loads(headers), body, stored_at)
+
+    def is_fresh(self, entry: CachedEntry) -> bool:
+        return self.offline or time.time() - entry.stored_at < self.ttl
+
+    def store(self, key: str, response: requests.Response):
+        """Cache a successful response and evict old entries if over budget."""
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        body = response.content
+        now = time.time()
+
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, status, headers, body, size, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, response.status_code, json.dumps(headers), body, len(body), now, now)
+            )
+            self._evict()
+            self.conn.commit()
+
+    def refresh(self, key: str):
+        """Mark an entry as fresh again after a 304 Not Modified."""
+        with self.lock:
+            self.conn.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits max_bytes."""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self.conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at ASC").fetchall():
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def cache_from_env() -> Optional[ResponseCache]:
+    """
+    Build the cache from environment variables, or return None if disabled.
+
+    EXTRACTOR_CACHE_PATH     SQLite file to use; the cache is off when unset
+    EXTRACTOR_CACHE_TTL      seconds before an entry is revalidated (default 7 days)
+    EXTRACTOR_CACHE_MAX_MB   size budget for LRU eviction (default 512)
+    EXTRACTOR_OFFLINE        "1" to serve only from the cache
+    """
+    path = os.environ.get("EXTRACTOR_CACHE_PATH")
+    if not path:
+        return None
+
+    return ResponseCache(
+        path,
+        ttl=float(os.environ.get("EXTRACTOR_CACHE_TTL", 7 * 24 * 3600)),
+        max_bytes=int(float(os.environ.get("EXTRACTOR_CACHE_MAX_MB", 512)) * 1024 * 1024),
+        offline=os.environ.get("EXTRACTOR_OFFLINE") == "1",
+    )
@@ -0,0 +1,112 @@
+from typing import Dict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+
+# Indicators extracted from the World Bank API: code -> description
+# https://data.worldbank.org/indicator/
+WORLD_BANK_INDICATORS = {
+    'SP.POP.TOTL': 'Population, total',
+    'NY.GDP.PCAP.CD': 'GDP per capita (current US$)',
+    'SI.POV.GAPS': 'Poverty headcount ratio at $2.15 a day (2017 PPP) (% of population)',
+    'SP.DYN.LE00.IN': 'Life expectancy at birth, total (years)',
+    'SE.SEC.ENRR': 'School enrollment, secondary (% gross)',
+    'SI.POV.GINI': 'Gini index (World Bank estimate)',
+    'SL.UEM.TOTL.ZS': 'Unemployment, total (% of total labor force)'
+}
+
+# Indicators that older landed files may still carry
+LEGACY_WORLD_BANK_INDICATORS = ['EN.ATM.CO2E.PC']
+
+CLIMATE_TRACE_GASES = ['co2', 'ch4', 'n2o', 'co2e_100yr', 'co2e_20yr']
+
+# Every landed file is keyed by country and year
+KEY_COLUMNS = {'country': pa.string(), 'year': pa.int64()}
+
+# Spark SQL type names for the Arrow types used in the schemas
+SPARK_TYPES = {pa.string(): "string", pa.int64(): "bigint", pa.float64(): "double"}
+
+
+def clean_column_name(name: str) -> str:
+    """Processed column name: lowercase, spaces and dots as underscores ('SP.POP.TOTL' -> 'sp_pop_totl')."""
+    return name.lower().replace(' ', '_').replace('.', '_').strip()
+
+
+class SourceSchema:
+    """
+    Declared columns of a landed source file, keyed by their landed names.
+
+    The processed (clean) names are what the pandas and Spark processors
+    write and what dbt staging selects (e.g. sp_pop_totl in
+    stg_combined_climate_economic). Columns that are not declared keep
+    their cleaned name and are treated as numeric.
+    """
+
+    def __init__(self, name: str, columns: Dict[str, pa.DataType]):
+        self.name = name
+        self.columns = columns
+
+    def clean_name(self, column: str) -> str:
+        return clean_column_name(column)
+
+    def rename_map(self) -> Dict[str, str]:
+        """Landed name -> processed name of every declared column."""
+        return {column: self.clean_name(column) for column in self.columns}
+
+    def arrow_types(self) -> Dict[str, pa.DataType]:
+        """Types by landed and by processed name, so already-cleaned files are typed as well."""
+        types = dict(self.columns)
+        types.update({self.clean_name(column): dtype for column, dtype in self.columns.items()})
+        return types
+
+    def spark_types(self) -> Dict[str, str]:
+        """Spark SQL type of every declared column, by processed name."""
+        return {self.clean_name(column): SPARK_TYPES[dtype] for column, dtype in self.columns.items()}
+
+
+WORLD_BANK_SCHEMA = SourceSchema("world_bank", {
+    **KEY_COLUMNS,
+    **{code: pa.float64() for code in list(WORLD_BANK_INDICATORS) + LEGACY_WORLD_BANK_INDICATORS},
+})
+
+CLIMATE_TRACE_SCHEMA = SourceSchema("climate_trace", {
+    **KEY_COLUMNS,
+    **{gas: pa.float64() for gas in CLIMATE_TRACE_GASES},
+})
+
+# Columns every partition of the combined dataset has, in order (dbt staging reads these)
+COMBINED_COLUMNS = (list(KEY_COLUMNS) + [clean_column_name(code) for code in WORLD_BANK_INDICATORS]
+                    + CLIMATE_TRACE_GASES)
+
+
+def coerce_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """Turn every non-numeric column except country into numbers, unparseable values becoming NaN."""
+    for col in df.columns:
+        if col != 'country' and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def read_csv(source, schema: SourceSchema) -> pd.DataFrame:
+    """
+    Read a landed CSV (path or file-like object) typed and renamed in one pass.
+
+    Parsing runs multi-threaded in the pyarrow CSV engine with the declared
+    column types applied while parsing; columns come out with their processed
+    names. If a declared numeric column holds text (e.g. '..'), the file is
+    re-read as text and coerced, the bad values becoming NaN.
+    """
+    read_options = pv.ReadOptions(use_threads=True)
+    try:
+        table = pv.read_csv(source, read_options=read_options, convert_options=pv.ConvertOptions(
+            column_types=schema.arrow_types(), strings_can_be_null=True))
+    except pa.ArrowInvalid as e:
+        print(f"Values in {schema.name} do not match the declared types ({e}); coercing them")
+        if hasattr(source, "seek"):
+            source.seek(0)
+        table = pv.read_csv(source, read_options=read_options, convert_options=pv.ConvertOptions(
+            column_types={column: pa.string() for column in schema.arrow_types()}, strings_can_be_null=True))
+
+    table = table.rename_columns([schema.clean_name(column) for column in table.column_names])
+    return coerce_numeric(table.to_pandas())
@@ -1,8 +1,9 @@
 from pyspark.sql import SparkSession
 from pyspark.sql import functions as F
-from pyspark.sql.types import DoubleType
 import os
 
+from schemas import CLIMATE_TRACE_SCHEMA, WORLD_BANK_SCHEMA
+
 
 def create_spark_session(app_name):
     """Create a Spark session"""
@@ -16,6 +17,17 @@ def create_spark_session(app_name):
     
     return spark
 
+def apply_schema(df, schema):
+    """
+    Rename columns to their processed names (see schemas.py) and cast them,
+    in a single projection: declared columns to their type, others to double.
+    """
+    types = schema.spark_types()
+    return df.select([
+        F.col(f"`{col}`").cast(types.get(schema.clean_name(col), "double")).alias(schema.clean_name(col))
+        for col in df.columns
+    ])
+
 def process_world_bank_data(input_path, output_path):
     """
     Process World Bank data using Spark
@@ -40,24 +52,20 @@ def process_world_bank_data(input_path, output_path):
 
     print(f"Reading data from: {input_path}")
 
-    # Read the CSV data
-    df = spark.read.option("header", "true").csv(input_path)
+    # Read the landed data: typed Parquet as-is, CSV with a header row
+    if input_path.endswith(".parquet"):
+        df = spark.read.parquet(input_path)
+    else:
+        df = spark.read.option("header", "true").csv(input_path)
 
     # Data transformations
-    # Convert string columns to appropriate types
-    numeric_columns = [
-        'SP_POP_TOTL', 'NY_GDP_PCAP_CD', 'EN_ATM_CO2E_PC',
-        'SP_DYN_LE00_IN', 'SE_SEC_ENRR', 'SI_POV_GINI', 'SL_UEM_TOTL_ZS'
-    ]
-
-    for col in numeric_columns:
-        if col in df.columns:
-            df = df.withColumn(col, df[col].cast(DoubleType()))
+    # Processed column names and types, shared with the pandas processor and dbt staging
+    df = apply_schema(df, WORLD_BANK_SCHEMA)
 
     # Add calculated columns
-    if 'SP_POP_TOTL' in df.columns and 'EN_ATM_CO2E_PC' in df.columns:
+    if 'sp_pop_totl' in df.columns and 'en_atm_co2e_pc' in df.columns:
         df = df.withColumn('total_emissions', 
-                          F.col('SP_POP_TOTL') * F.col('EN_ATM_CO2E_PC'))
+                          F.col('sp_pop_totl') * F.col('en_atm_co2e_pc'))
     
     # Write the processed data
     df.write.format("parquet").mode("overwrite").save(output_path)
@@ -89,15 +97,16 @@ def process_climate_trace_data(input_path, output_path):
     
     print(f"Reading data from: {input_path}")
     
-    # Read the CSV data
-    df = spark.read.option("header", "true").csv(input_path)
+    # Read the landed data: typed Parquet as-is, CSV with a header row
+    if input_path.endswith(".parquet"):
+        df = spark.read.parquet(input_path)
+    else:
+        df = spark.read.option("header", "true").csv(input_path)
 
 
     
-    # Convert relevant columns to double
-    for col in df.columns:
-        if col != 'country' and col != 'year':
-            df = df.withColumn(col, df[col].cast(DoubleType()))
+    # Processed column names and types (emissions as double), shared with the pandas processor
+    df = apply_schema(df, CLIMATE_TRACE_SCHEMA)
     
     # Add calculated columns like percentage of energy emissions to total
     if 'total' in df.columns and 'energy' in df.columns:
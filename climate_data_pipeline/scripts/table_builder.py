@@ -0,0 +1,62 @@
+import pandas as pd
+from typing import Any, Dict, Hashable, List, Optional
+
+
+class KeyedColumnBuilder:
+    """
+    Accumulates (key, column, value) cells into column arrays.
+
+    Rows are found through a key -> row position index, so adding a value is
+    O(1) no matter how many rows exist. The DataFrame is built once from the
+    column arrays instead of from a list of per-row dicts.
+    """
+
+    def __init__(self, key_column: str = 'country', constants: Optional[Dict[str, Any]] = None):
+        self.key_column = key_column
+        self.constants = constants or {}
+        self._index: Dict[Hashable, int] = {}
+        self._columns: Dict[str, List[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def row(self, key: Hashable) -> int:
+        """Return the row position for key, adding a new row if needed."""
+        position = self._index.get(key)
+        if position is None:
+            position = len(self._index)
+            self._index[key] = position
+        return position
+
+    def set(self, key: Hashable, column: str, value: Any):
+        """Set the value of column for the row identified by key."""
+        position = self.row(key)
+        values = self._columns.get(column)
+        if values is None:
+            values = self._columns[column] = []
+        if len(values) <= position:
+            values.extend([None] * (position + 1 - len(values)))
+        values[position] = value
+
+    def to_frame(self, column_order: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Build the DataFrame: key column, constant columns, then value columns.
+
+        Value columns follow column_order when given (missing ones are
+        skipped), followed by any remaining columns in first-seen order.
+        """
+        n_rows = len(self._index)
+        if n_rows == 0:
+            return pd.DataFrame()
+
+        data = {self.key_column: list(self._index)}
+        for name, value in self.constants.items():
+            data[name] = [value] * n_rows
+
+        ordered = [name for name in (column_order or []) if name in self._columns]
+        ordered += [name for name in self._columns if name not in ordered]
+        for name in ordered:
+            values = self._columns[name]
+            data[name] = values + [None] * (n_rows - len(values))
+
+        return pd.DataFrame(data)
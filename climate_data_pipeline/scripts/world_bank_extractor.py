@@ -1,167 +1,84 @@
-import os
 import sys
-import requests
-import pandas as pd
 import argparse
-from typing import List, Dict, Union, Any
-import time
+from typing import List
+
+from http_transport import HttpTransport
+from country_registry import CountryRegistry
+from data_extractor import extract_years
+from landing_format import LANDING_FORMATS
+from object_store import ObjectStore, store_from_uri
+from extraction_metrics import write_run_metrics
+from extraction_sources import WORLD_BANK_API, world_bank_source
+from response_archive import ResponseArchive, archive_from_env
 
 class WorldBankExtractor:
-    BASE_URL = "https://api.worldbank.org/v2"
+    """
+    World Bank indicators for a range of years, one file per year.
+
+    A thin wrapper over the extraction engine: requests, paging,
+    checkpoints and the response archive are those of the world_bank source
+    in extraction_sources (indicators in schemas.WORLD_BANK_INDICATORS), run
+    for every year at once.
+    """
+    BASE_URL = WORLD_BANK_API
     OUTPUT_DIR = "world_bank_data"
 
-    # List of indicators to extract (you can modify this list)
-    # https://data.worldbank.org/indicator/
-
-    INDICATORS = {
-        'SP.POP.TOTL': 'Population, total',
-        'NY.GDP.PCAP.CD': 'GDP per capita (current US$)',
-        'SI.POV.GAPS': 'Poverty headcount ratio at $2.15 a day (2017 PPP) (% of population)',
-        'SP.DYN.LE00.IN': 'Life expectancy at birth, total (years)',
-        'SE.SEC.ENRR': 'School enrollment, secondary (% gross)',
-        'SI.POV.GINI': 'Gini index (World Bank estimate)',
-        'SL.UEM.TOTL.ZS': 'Unemployment, total (% of total labor force)'
-    }
-
-    def __init__(self, start_year: int, end_year: int = None):
-        # Ensure output directory exists
-        os.makedirs(self.OUTPUT_DIR, exist_ok=True)
-
+    def __init__(self, start_year: int, end_year: int = None, bulk: bool = False, multi_indicator: bool = False,
+                 transport: HttpTransport = None, country_registry: CountryRegistry = None,
+                 streaming: bool = False, landing_format: str = "csv",
+                 object_store: ObjectStore = None, archive: ResponseArchive = None):
         self.start_year = start_year
         self.end_year = end_year or start_year
 
-    def get_countries(self) -> List[Dict]:
-        """Retrieve list of countries from World Bank API."""
-        try:
-            response = requests.get(f"{self.BASE_URL}/country?format=json&per_page=300")
-            response.raise_for_status()
-
-            # World Bank returns a list where the first element is metadata and the second is the actual data
-            result = response.json()
-            if len(result) > 1 and isinstance(result[1], list):
-                return result[1]
-            return []
-        except requests.RequestException as e:
-            print(f"Error fetching countries: {e}")
-            return []
-
-    def fetch_indicator_data(self, indicator: str, year: int) -> List[Dict]:
-        """Fetch data for a specific indicator and year for all countries."""
-        url = f"{self.BASE_URL}/countries/all/indicators/{indicator}"
-        params = {
-            "date": year,
-            "format": "json",
-            "per_page": 300  # Maximum allowed to get all countries in one request
-        }
-
-        try:
-            print(f"Fetching {self.INDICATORS.get(indicator, indicator)} data for {year}...")
-            response = requests.get(url, params=params)
-            print(f"Response status: {response.status_code}")
-
-            response.raise_for_status()
-            result = response.json()
-
-            # Check if we have data in the response
-            if len(result) > 1 and isinstance(result[1], list):
-                return result[1]
-            return []
-        except requests.RequestException as e:
-            print(f"Error fetching indicator data: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Error response: {e.response.text[:500]}")
-            return []
-
-    def process_indicator_data(self, data: List[Dict], indicator: str) -> Dict[str, float]:
-        """Process indicator data into a dictionary with country codes as keys."""
-        result = {}
-
-        for item in data:
-            if not isinstance(item, dict):
-                continue
-
-            country_code = item.get('countryiso3code')
-            value = item.get('value')
-
-            # Skip entries with missing country code or value
-            if not country_code or value is None or country_code == '':
-                continue
-
-            result[country_code] = value
+        # In bulk mode each indicator is fetched once for the whole date range, in multi-indicator
+        # mode all indicators share one request per date, and in streaming mode responses are
+        # parsed incrementally into Arrow record batches
+        self.source = world_bank_source(multi_indicator=multi_indicator, bulk=bulk, streaming=streaming)
 
-        return result
+        # Output files: "csv", "parquet" (typed, zstd-compressed) or "both"
+        self.landing_format = landing_format
 
-    def extract_indicators_for_year(self, year: int) -> pd.DataFrame:
-        """Extract all indicators for a specific year and combine into one DataFrame."""
-        # Dictionary to collect all indicator data
-        country_data = {}
+        # When set, years are uploaded from memory to <source>/<file> in this store instead of written locally
+        self.object_store = object_store
 
-        # For each indicator
-        for indicator_code, indicator_name in self.INDICATORS.items():
-            # Fetch data
-            data = self.fetch_indicator_data(indicator_code, year)
+        # Shared transport and country cache unless given; raw responses archived to EXTRACTOR_ARCHIVE_DIR when set
+        self.transport = transport
+        self.country_registry = country_registry
+        self.archive = archive or archive_from_env()
 
-            # Process into dictionary: country_code -> value
-            indicator_data = self.process_indicator_data(data, indicator_code)
+    def extract_data(self, replay: bool = False) -> List[int]:
+        """
+        Main extraction pipeline, or a rebuild from the response archive with replay.
 
-            # Add to country_data dictionary
-            for country_code, value in indicator_data.items():
-                if country_code not in country_data:
-                    country_data[country_code] = {'country': country_code}
-
-                # Use the short indicator code as column name
-                country_data[country_code][indicator_code] = value
-
-            # Add a small delay to avoid hitting API rate limits
-            time.sleep(0.5)
-
-        # Convert to DataFrame
-        df = pd.DataFrame(list(country_data.values()))
-
-        # If we have data, ensure 'country' is the first column
-        if not df.empty and 'country' in df.columns:
-            cols = ['country'] + [col for col in df.columns if col != 'country']
-            df = df[cols]
-
-        return df
-
-    def save_year_data(self, year: int, data: pd.DataFrame):
-        """Save data for a specific year to CSV."""
-        # Create output filename
-        filename = os.path.join(self.OUTPUT_DIR, f"world_bank_indicators_{year}.csv")
-
-        # Save to CSV
-        if not data.empty:
-            data.to_csv(filename, index=False)
-            print(f"Saved World Bank data for {year} to {filename}")
-
-            # Print some statistics
-            print(f"Number of countries with data: {len(data)}")
-            print(f"Columns included: {', '.join(data.columns)}")
-        else:
-            print(f"No data available for {year}")
-
-    def extract_data(self):
-        """Main extraction pipeline."""
+        Returns the years that could not be completed; they are not written
+        and a rerun fetches only their missing indicators.
+        """
         print(f"Extracting World Bank indicators from {self.start_year} to {self.end_year}")
-
-        # For each year in the range
-        for year in range(self.start_year, self.end_year + 1):
-            print(f"\nProcessing year {year}...")
-
-            # Extract all indicators for this year
-            df = self.extract_indicators_for_year(year)
-
-            # Save the data
-            self.save_year_data(year, df)
-
-            print(f"Completed processing for {year}")
+        years = list(range(self.start_year, self.end_year + 1))
+        incomplete = extract_years(self.source, years, self.OUTPUT_DIR, self.landing_format, self.object_store,
+                                   self.archive, replay, transport=self.transport,
+                                   country_registry=self.country_registry)
+        if incomplete:
+            print(f"Incomplete years {incomplete}; completed requests are kept in {self.OUTPUT_DIR}/.checkpoints")
+        return incomplete
 
 def main():
     # Set up argument parser
     parser = argparse.ArgumentParser(description="World Bank Data Extractor")
     parser.add_argument("start_year", type=int, help="Starting year for data extraction")
     parser.add_argument("--end_year", type=int, help="Ending year for data extraction (optional)")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Fetch each indicator once for the whole year range (date=START:END)")
+    parser.add_argument("--multi_indicator", action="store_true",
+                        help="Fetch all indicators in a single request per date")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Parse responses incrementally into Arrow record batches")
+    parser.add_argument("--landing_format", choices=LANDING_FORMATS, default="csv",
+                        help="Write each year as CSV, typed Parquet, or both")
+    parser.add_argument("--object_store",
+                        help="Upload each year straight to this store (gs://bucket[/prefix] or a directory)")
+    parser.add_argument("--replay", action="store_true",
+                        help="Rebuild the years from the response archive in EXTRACTOR_ARCHIVE_DIR")
 
     # Parse arguments
     args = parser.parse_args()
@@ -169,9 +86,19 @@ def main():
     # Create extractor and run pipeline
     extractor = WorldBankExtractor(
         start_year=args.start_year,
-        end_year=args.end_year
+        end_year=args.end_year,
+        bulk=args.bulk,
+        multi_indicator=args.multi_indicator,
+        streaming=args.streaming,
+        landing_format=args.landing_format,
+        object_store=store_from_uri(args.object_store) if args.object_store else None
     )
-    extractor.extract_data()
+    incomplete = extractor.extract_data(replay=args.replay)
+
+    # Request latency, sizes, retries and rate-limit waits of this run (with EXTRACTOR_METRICS_DIR)
+    write_run_metrics(f"world_bank_{args.start_year}_{args.end_year or args.start_year}")
+    if incomplete:
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()